@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edumet.settings')
 
 application = get_asgi_application()
+
+# Load the grade model before the first request rather than during it
+from mainapp.apps import preload_model
+preload_model()
@@ -124,6 +124,42 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='edumetspp@gmail.com')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='wuhw rmgy jltx fupx')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Low attendance alerts are not repeated for the same student within this many hours
+ATTENDANCE_ALERT_COOLDOWN_HOURS = config('ATTENDANCE_ALERT_COOLDOWN_HOURS', default=72, cast=int)
+
+# Outbox worker (manage.py process_email_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_CONCURRENCY = config('EMAIL_OUTBOX_CONCURRENCY', default=4, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+
+# Grade model: a joblib artifact (optionally memory-mapped so forked workers share its arrays),
+# or sppml's bundled model when no path is set. Server processes (wsgi.py, asgi.py, runserver)
+# preload it once at startup; anything else loads it on first use
+SPPML_MODEL_PATH = config('SPPML_MODEL_PATH', default='')
+SPPML_MODEL_MMAP_MODE = config('SPPML_MODEL_MMAP_MODE', default=None)
+# Parameters written by `manage.py export_numpy_model`; when set they are evaluated with plain NumPy
+# and the scikit-learn model above is only loaded if they cannot be
+SPPML_NUMPY_MODEL_PATH = config('SPPML_NUMPY_MODEL_PATH', default='')
+SPPML_PRELOAD = config('SPPML_PRELOAD', default=True, cast=bool)
+# How often each worker looks for a newly deployed (or replaced) model
+SPPML_RELEASE_CHECK_SECONDS = config('SPPML_RELEASE_CHECK_SECONDS', default=10, cast=float)
+
+# Prediction jobs: scoring processes (0 = one per CPU) and rows per partition
+PREDICTION_JOB_WORKERS = config('PREDICTION_JOB_WORKERS', default=0, cast=int) or None
+PREDICTION_JOB_PARTITION_SIZE = config('PREDICTION_JOB_PARTITION_SIZE', default=2000, cast=int)
+
+# predictStudent/ micro-batching: how long to collect concurrent requests (0 disables) and the largest batch
+PREDICT_BATCH_WINDOW_MS = config('PREDICT_BATCH_WINDOW_MS', default=5, cast=float)
+PREDICT_BATCH_MAX_SIZE = config('PREDICT_BATCH_MAX_SIZE', default=32, cast=int)
+
+# How long a school's student ids are cached for random sampling
+STUDENT_SAMPLE_CACHE_SECONDS = config('STUDENT_SAMPLE_CACHE_SECONDS', default=300, cast=int)
+
+# Per-student prediction cache: in-process LRU size, plus an optional shared Django cache alias and its timeout
+PREDICTION_CACHE_SIZE = config('PREDICTION_CACHE_SIZE', default=10000, cast=int)
+PREDICTION_CACHE_ALIAS = config('PREDICTION_CACHE_ALIAS', default='')
+PREDICTION_CACHE_TIMEOUT = config('PREDICTION_CACHE_TIMEOUT', default=86400, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edumet.settings')
 
 application = get_wsgi_application()
+
+# Load the grade model before the first request rather than during it
+from mainapp.apps import preload_model
+preload_model()
@@ -1,4 +1,43 @@
 from django.apps import AppConfig
+import logging
+import multiprocessing
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Management commands that serve requests; wsgi.py and asgi.py preload for real servers
+SERVER_COMMANDS = {'runserver'}
+
+
+def preload_model(releases=True):
+    """
+    Loads and warms the grade model before the process serves its first request:
+    the deployed release (and shadow) if there is one, otherwise the model in
+    settings. Only server entry points call this; every other process loads
+    the model on first use. With releases=False the ModelRelease table is not
+    read, for callers still inside app initialization; the first request then
+    checks it before being served.
+    """
+    from django.conf import settings
+    from .logics.model_registry import registry
+    from .logics.model_rollout import release_watcher
+    # Process pool workers run ready() too but load the model their parent hands them
+    if not settings.SPPML_PRELOAD or multiprocessing.parent_process() is not None:
+        return
+    if releases:
+        try:
+            release_watcher.check(force=True, background=False)
+        except Exception:
+            logger.exception("Reading model releases failed")
+    if registry.loaded:
+        return
+    try:
+        # No release, or it failed to load: serve the configured model until the next check retries it
+        registry.load()
+    except Exception:
+        # Requests load it lazily instead; a broken model should not stop the app from starting
+        logger.exception("Grade model preload failed")
+
 
 class MainappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -6,4 +45,7 @@ class MainappConfig(AppConfig):
     name = 'mainapp'
     def ready(self):
         import mainapp.signals
-        import mainapp.models
\ No newline at end of file
+        import mainapp.models
+        if sys.argv[1:2] and sys.argv[1] in SERVER_COMMANDS:
+            # No database access during app initialization; releases are checked on the first request
+            preload_model(releases=False)
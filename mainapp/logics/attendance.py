@@ -1,15 +1,90 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status as http_status
-from ..models import Attendance, Class, ClassWorkingDay, Student, School
+from ..models import Attendance, AttendanceMark, AttendanceTally, Class, ClassWorkingDay, Student, School
 from ..serializers import AttendanceSerializer
 from django.utils.dateparse import parse_date
 from datetime import date
-from django.db import transaction
+from django.db import transaction, connection
 from django.db import IntegrityError
-from ..logics.email import send_email_sync
+from django.db.models import Count
+from ..logics.email import queue_email
+from .prediction_cache import prediction_cache
 import datetime, traceback
-from rest_framework.test import APIRequestFactory
+
+
+class QueryCounter:
+    """
+    Counts the database queries run inside the block.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+
+def recompute_class_attendance(class_obj):
+    """
+    Recounts every student's present days for the class from the marks in a single
+    aggregate query, then writes the changed tallies and Student.attendance_percentage
+    values with one bulk_update each. Counts and percentages follow Attendance.save(),
+    so either path leaves the same numbers. Returns {student_id: (present_count, percentage)}.
+    """
+    school_id, class_number = class_obj.school_id, class_obj.class_number
+    total_working_days = Attendance.class_working_days(school_id, class_number)
+
+    present_counts = dict(
+        AttendanceMark.objects.filter(
+            school_id=school_id,
+            class_number=class_number,
+            status=AttendanceMark.PRESENT
+        ).values('student_id').annotate(present_count=Count('id')).values_list('student_id', 'present_count')
+    )
+
+    tallies = {
+        tally.student_id: tally
+        for tally in AttendanceTally.objects.select_for_update().filter(school_id=school_id, class_number=class_number)
+    }
+    tallies_to_create, tallies_to_update = [], []
+    for student_id in present_counts.keys() | tallies.keys():
+        present_count = present_counts.get(student_id, 0)
+        tally = tallies.get(student_id)
+        if tally is None:
+            tallies_to_create.append(AttendanceTally(
+                school_id=school_id, class_number=class_number, student_id=student_id, present_count=present_count
+            ))
+        elif tally.present_count != present_count:
+            tally.present_count = present_count
+            tallies_to_update.append(tally)
+    if tallies_to_create:
+        AttendanceTally.objects.bulk_create(tallies_to_create)
+    if tallies_to_update:
+        AttendanceTally.objects.bulk_update(tallies_to_update, ['present_count'])
+
+    class_totals = {}
+    students_to_update = []
+    for student in Student.objects.filter(school_id=school_id, class_assigned=class_number).only('id', 'student_id', 'attendance_percentage'):
+        present_count = present_counts.get(student.student_id, 0)
+        percentage = Attendance.percentage(present_count, total_working_days)
+        class_totals[student.student_id] = (present_count, percentage)
+        if student.attendance_percentage != percentage:
+            student.attendance_percentage = percentage
+            students_to_update.append(student)
+    if students_to_update:
+        Student.objects.bulk_update(students_to_update, ['attendance_percentage'])
+        prediction_cache.forget(student.student_id for student in students_to_update)
+
+    return class_totals
 
 # Add Attendance (POST API)
 @api_view(['POST'])
@@ -21,43 +96,99 @@ def add_attendance(request):
         return Response({"message": "Missing required fields"}, status=http_status.HTTP_400_BAD_REQUEST)
 
     date_obj = parse_date(data['date']) or date.today()
+    error_response = _check_attendance_date(data['class_number'], date_obj)
+    if error_response:
+        return error_response
+
+    data["school"] = School.objects.get(id=data["school_id"]).name
+    attendance, created = save_attendance_sheet(
+        data['school'], data['school_id'], data['class_number'], date_obj, data['students']
+    )
+
+    return Response({
+        "message": "Attendance saved successfully",
+        "data": AttendanceSerializer(attendance).data
+    }, status=http_status.HTTP_201_CREATED if created else http_status.HTTP_200_OK)
+
+
+def _check_attendance_date(class_number, date_obj):
+    """
+    Returns an error Response if attendance cannot be added for date_obj, otherwise None.
+    """
     if date_obj > date.today():
         return Response({"message": "Cannot add attendance for future dates"}, status=http_status.HTTP_400_BAD_REQUEST)
 
-    try:
-        class_obj = Class.objects.get(class_number=data['class_number'])
-    except Class.DoesNotExist:
+    start_date = Class.objects.filter(class_number=class_number).values_list('start_date', flat=True).first()
+    if start_date is None:
         return Response({"message": "Class not found"}, status=http_status.HTTP_404_NOT_FOUND)
 
-    if date_obj < class_obj.start_date:
+    if date_obj < start_date:
         return Response({"message": "Attendance can only be added from class start date onwards"}, status=http_status.HTTP_400_BAD_REQUEST)
 
-    data["school"] = School.objects.get(id=data["school_id"]).name
-    class_working_day, created = ClassWorkingDay.objects.get_or_create(
-        school_id=data['school_id'], class_number=data['class_number'], defaults={'school': data['school'], 'working_days': {}}
-    )
-    class_working_day.working_days.setdefault(date_obj.isoformat(), False)
-    class_working_day.save()
+    return None
 
-    attendance, created = Attendance.objects.get_or_create(
-        school_id=data['school_id'], class_number=data['class_number'], date=date_obj, defaults={'students': []}
-    )
 
-    existing_students = {stu['student_id']: stu for stu in attendance.students}
-    for student_data in data['students']:
+def _class_roster(school_id, class_number):
+    return [
+        {
+            "student_id": student['student_id'],
+            "name": student['full_name'],
+            "email": student['email'],
+            "phone": student['phone'],
+            "status": "not_marked",
+            "present_count": 0,
+            "percentage": 0.0
+        }
+        for student in Student.objects.filter(
+            school_id=school_id, class_assigned=class_number
+        ).values('student_id', 'full_name', 'email', 'phone')
+    ]
+
+
+def _merge_students(current, students):
+    """
+    current roster entries with the given entries merged in by student_id.
+    """
+    merged = {stu['student_id']: stu for stu in current}
+    for student_data in students:
         student_id = student_data.get('student_id')
         if student_id:
-            existing_student = existing_students.get(student_id, {})
+            existing_student = merged.get(student_id, {})
             existing_student.update(student_data)
-            existing_students[student_id] = existing_student
+            merged[student_id] = existing_student
+    return list(merged.values())
+
+
+def save_attendance_sheet(school, school_id, class_number, date_obj, students):
+    """
+    Creates the day's attendance sheet if needed and merges the given student
+    entries into it by student_id. Returns (attendance, created).
+    """
+    with transaction.atomic():
+        ClassWorkingDay.objects.get_or_create(
+            school_id=school_id, class_number=class_number, defaults={'school': school}
+        )
 
-    attendance.students = list(existing_students.values())
-    attendance.save()
+        sheet = Attendance.objects.select_for_update().filter(
+            school_id=school_id, class_number=class_number, date=date_obj
+        )
+        attendance = sheet.first()
+        if attendance is None:
+            try:
+                # A new sheet is inserted once, with its students
+                with transaction.atomic():
+                    attendance = Attendance(school=school, school_id=school_id, class_number=class_number, date=date_obj)
+                    attendance.students = _merge_students([], students)
+                    attendance.save()
+                return attendance, True
+            except IntegrityError:
+                # A concurrent request inserted the sheet first (there was no row to lock): merge into it
+                attendance = sheet.get()
 
-    return Response({
-        "message": "Attendance saved successfully",
-        "data": AttendanceSerializer(attendance).data
-    }, status=http_status.HTTP_201_CREATED if created else http_status.HTTP_200_OK)
+        attendance.students = _merge_students(attendance.students, students)
+        attendance.save()
+
+    return attendance, False
 
 
 # Update Class Attendance (PUT API)
@@ -102,7 +233,7 @@ def update_class_attendance(request):
 
     while retry_count < max_retries:
         try:
-            with transaction.atomic():
+            with QueryCounter() as query_counter, transaction.atomic():
                 # Attempt to retrieve existing attendance with a lock
                 attendance = Attendance.objects.select_for_update().filter(
                     school_id=school_id,
@@ -157,63 +288,33 @@ def update_class_attendance(request):
 
                     updated_students.append(student_data)
 
-                attendance.students = updated_students
-                attendance.save()
-
                 # Update ClassWorkingDay
                 class_working_day, _ = ClassWorkingDay.objects.get_or_create(
                     school_id=school_id,
                     class_number=class_number,
-                    defaults={'working_days': {}}
+                    defaults={'school': school}
                 )
-                class_working_day.working_days[date_obj.isoformat()] = all_students_marked
+                was_working = class_working_day.set_working(date_obj, all_students_marked)
                 class_working_day.save()
 
                 # Update total working days count
-                class_obj.total_working_days = sum(
-                    1 for marked in class_working_day.working_days.values() if marked
-                )
-                class_obj.save()
+                class_obj.apply_working_day_change(date_obj, was_working, all_students_marked)
 
-                # Recalculate present counts for all students
-                all_attendances = Attendance.objects.filter(
-                    school_id=school_id,
-                    class_number=class_number,
-                    date__gte=class_obj.start_date,
-                    date__lte=date.today()
-                ).order_by('date')
-
-                student_present_counts = {
-                    stu.student_id: 0
-                    for stu in Student.objects.filter(school_id=school_id, class_assigned=class_number)
-                }
-
-                for att in all_attendances:
-                    for student in att.students:
-                        student_id = student['student_id']
-                        if student.get('status') == 'present' and student_id in student_present_counts:
-                            student_present_counts[student_id] += 1
-
-                for att in all_attendances:
-                    needs_save = False
-                    for student in att.students:
-                        student_id = student['student_id']
-                        current_present_count = student_present_counts.get(student_id, 0)
-
-                        if student.get('present_count', 0) != current_present_count:
-                            student['present_count'] = current_present_count
-                            student['percentage'] = round(
-                                (current_present_count / class_obj.total_working_days) * 100, 2
-                            ) if class_obj.total_working_days > 0 else 0.0
-                            needs_save = True
-
-                    if needs_save:
-                        att.save()
+                attendance.students = updated_students
+                attendance.save(sync_students=False)
+
+                # Recalculate present counts and percentages for the whole class in one pass
+                class_totals = recompute_class_attendance(class_obj)
+                for student in attendance.students:
+                    student['present_count'], student['percentage'] = class_totals.get(
+                        student['student_id'], (student['present_count'], student['percentage'])
+                    )
 
                 return Response(
                     {
                         "message": f"Attendance for class {class_number} on {date_obj} updated successfully",
-                        "data": AttendanceSerializer(attendance).data
+                        "data": AttendanceSerializer(attendance).data,
+                        "queries": query_counter.count
                     },
                     status=http_status.HTTP_200_OK
                 )
@@ -241,6 +342,170 @@ def update_class_attendance(request):
     )
 
 
+# Update Class Attendance for Many Days (PUT API)
+@api_view(['PUT'])
+def bulk_update_class_attendance(request):
+    """
+    Marks attendance for several dates of one class in a single transaction.
+    Expected payload: school, school_id, class_number and
+    days: [{"date": "YYYY-MM-DD", "students": [{"student_id": ..., "status": ...}]}]
+    """
+    data = request.data
+    school = data.get("school")
+    school_id = data.get("school_id")
+    class_number = data.get("class_number")
+    days = data.get("days")
+
+    if not all([school, school_id, class_number, days]) or not isinstance(days, list):
+        return Response(
+            {"message": "school, school_id, class_number, and days are required"},
+            status=http_status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        class_obj = Class.objects.get(class_number=class_number, school_id=school_id)
+    except Class.DoesNotExist:
+        return Response(
+            {"message": "Class not found"},
+            status=http_status.HTTP_404_NOT_FOUND
+        )
+
+    statuses_by_date = {}
+    for day in days:
+        if not isinstance(day, dict) or not isinstance(day.get("students") or [], list):
+            return Response(
+                {"message": "Each day must be an object with a date and a list of students"},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            date_obj = parse_date(str(day.get("date") or ""))
+        except ValueError:
+            date_obj = None
+        if not date_obj or date_obj > date.today():
+            return Response(
+                {"message": f"Invalid or future date: {day.get('date')}"},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        if date_obj < class_obj.start_date:
+            return Response(
+                {"message": f"Attendance can only be updated from {class_obj.start_date} onwards"},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        if date_obj in statuses_by_date:
+            return Response(
+                {"message": f"Date {date_obj} is given more than once"},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        statuses = {}
+        for student in day.get("students") or []:
+            if not isinstance(student, dict):
+                return Response(
+                    {"message": "student_id and status are required for each student"},
+                    status=http_status.HTTP_400_BAD_REQUEST
+                )
+            student_id = student.get("student_id")
+            new_status = student.get("status")
+            if not student_id or not new_status:
+                return Response(
+                    {"message": "student_id and status are required for each student"},
+                    status=http_status.HTTP_400_BAD_REQUEST
+                )
+            if new_status not in AttendanceMark.STATUS_CODES:
+                return Response(
+                    {"message": "Invalid status"},
+                    status=http_status.HTTP_400_BAD_REQUEST
+                )
+            statuses[student_id] = new_status
+
+        if not statuses:
+            return Response(
+                {"message": f"No students given for {date_obj}"},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        statuses_by_date[date_obj] = statuses
+
+    try:
+        with QueryCounter() as query_counter, transaction.atomic():
+            # Day headers, created in one insert for dates that have none yet
+            existing_dates = set(
+                Attendance.objects.select_for_update().filter(
+                    school_id=school_id, class_number=class_number, date__in=statuses_by_date
+                ).values_list('date', flat=True)
+            )
+            Attendance.objects.bulk_create([
+                Attendance(school=school, school_id=school_id, class_number=class_number, date=date_obj)
+                for date_obj in statuses_by_date if date_obj not in existing_dates
+            ])
+
+            _write_marks(school_id, class_number, statuses_by_date)
+
+            # Working days, flipped on the calendar and the class counter once for the whole range
+            class_working_day, _ = ClassWorkingDay.objects.select_for_update().get_or_create(
+                school_id=school_id,
+                class_number=class_number,
+                defaults={'school': school}
+            )
+            changes = []
+            for date_obj, statuses in statuses_by_date.items():
+                is_working = 'not_marked' not in statuses.values()
+                changes.append((date_obj, class_working_day.set_working(date_obj, is_working), is_working))
+            class_working_day.save()
+            class_obj.apply_working_day_changes(changes)
+
+            recompute_class_attendance(class_obj)
+
+    except IntegrityError:
+        return Response(
+            {"message": "Attendance was changed by another request. Please try again."},
+            status=http_status.HTTP_409_CONFLICT
+        )
+
+    return Response(
+        {
+            "message": f"Attendance for class {class_number} updated for {len(statuses_by_date)} days",
+            "dates": sorted(date_obj.isoformat() for date_obj in statuses_by_date),
+            "queries": query_counter.count
+        },
+        status=http_status.HTTP_200_OK
+    )
+
+
+def _write_marks(school_id, class_number, statuses_by_date):
+    """
+    Replaces the marks of each given date with {student_id: status}, writing only
+    the rows that differ. Tallies are left to recompute_class_attendance.
+    """
+    stored_marks = {
+        (mark.date, mark.student_id): mark
+        for mark in AttendanceMark.objects.select_for_update().filter(
+            school_id=school_id, class_number=class_number, date__in=statuses_by_date
+        ).only('id', 'date', 'student_id', 'status')
+    }
+
+    to_create, to_update = [], []
+    for date_obj, statuses in statuses_by_date.items():
+        for student_id, status in statuses.items():
+            status_code = AttendanceMark.STATUS_CODES[status]
+            mark = stored_marks.pop((date_obj, student_id), None)
+            if mark is None:
+                to_create.append(AttendanceMark(
+                    school_id=school_id, class_number=class_number, date=date_obj,
+                    student_id=student_id, status=status_code
+                ))
+            elif mark.status != status_code:
+                mark.status = status_code
+                to_update.append(mark)
+
+    if to_create:
+        AttendanceMark.objects.bulk_create(to_create, batch_size=1000)
+    if to_update:
+        AttendanceMark.objects.bulk_update(to_update, ['status'], batch_size=1000)
+    # Whatever is left was not in the payload for its date
+    if stored_marks:
+        AttendanceMark.objects.filter(pk__in=[mark.pk for mark in stored_marks.values()]).delete()
+
+
 @api_view(['GET'])
 def get_attendance(request):
     class_number = request.GET.get('class_number')
@@ -257,58 +522,39 @@ def get_attendance(request):
                       status=http_status.HTTP_400_BAD_REQUEST)
 
     try:
-        attendance = Attendance.objects.get(class_number=class_number, school_id=school_id, date=date_obj)
-        
-        # Get student IDs already in attendance
-        existing_ids = {student['student_id'] for student in attendance.students}
-
-        # Get all current students of that class
-        all_students = Student.objects.filter(school_id=school_id, class_assigned=class_number)
-
-        new_students_added = False
-        for student in all_students:
-            if student.student_id not in existing_ids:
-                attendance.students.append({
-                    "student_id": student.student_id,
-                    "name": student.full_name,
-                    "email": student.email,
-                    "phone": student.phone,
-                    "status": "not_marked",
-                    "present_count": 0,
-                    "percentage": 0.0
-                })
-                new_students_added = True
-
-        if new_students_added:
-            attendance.save()
+        with transaction.atomic():
+            # Locked while the roster is compared, so concurrent reads add a new student once
+            attendance = Attendance.objects.select_for_update().get(class_number=class_number, school_id=school_id, date=date_obj)
 
-    except Attendance.DoesNotExist:
-        # Instead of modifying request.data, create a new dictionary
-        attendance_data = {
-            "school": School.objects.get(id=school_id).name,
-            "school_id": school_id,
-            "class_number": class_number,
-            "date": date_str,
-            "students": [
-                {
-                    "student_id": student.student_id,
-                    "name": student.full_name,
-                    "email": student.email,
-                    "phone": student.phone,
-                    "status": "not_marked",
-                    "present_count": 0,
-                    "percentage": 0.0
-                }
-                for student in Student.objects.filter(school_id=school_id, class_assigned=class_number)
+            # Get student IDs already in attendance
+            existing_ids = {student['student_id'] for student in attendance.students}
+
+            # Get all current students of that class
+            new_students = [
+                student for student in _class_roster(school_id, class_number)
+                if student['student_id'] not in existing_ids
             ]
-        }
-        
-        factory = APIRequestFactory()
-        new_request = factory.post('/attendance/', attendance_data, format='json')
-        new_request.user = request.user
-        new_request.auth = request.auth
-        
-        return add_attendance(new_request)
+
+            if new_students:
+                attendance.students.extend(new_students)
+                attendance.save()
+
+    except Attendance.DoesNotExist:
+        error_response = _check_attendance_date(class_number, date_obj)
+        if error_response:
+            return error_response
+
+        school = School.objects.filter(id=school_id).values_list('name', flat=True).first()
+        if school is None:
+            return Response({"message": "School not found"}, status=http_status.HTTP_404_NOT_FOUND)
+
+        attendance, created = save_attendance_sheet(
+            school, school_id, class_number, date_obj, _class_roster(school_id, class_number)
+        )
+        return Response({
+            "message": "Attendance saved successfully",
+            "data": AttendanceSerializer(attendance).data
+        }, status=http_status.HTTP_201_CREATED if created else http_status.HTTP_200_OK)
 
     serializer = AttendanceSerializer(attendance)
     return Response(serializer.data, status=http_status.HTTP_200_OK)
@@ -344,7 +590,7 @@ def send_attendance_alert(request):
         'current_year': datetime.datetime.now().year
     }
 
-    send_email_sync(
+    queue_email(
         subject=email_subject,
         template_name='emails/low_attendance_alert.html',
         context=email_context,
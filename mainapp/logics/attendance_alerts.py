@@ -0,0 +1,120 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status as http_status
+from ..models import AttendanceAlert, AttendanceTally, Class, Student
+from .email import queue_email_batch
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+import datetime
+
+ALERT_SUBJECT = "📉 Low Attendance Alert from EduMet"
+
+
+def students_below_threshold(school_id=None, class_number=None, cooldown_hours=None):
+    """
+    Students whose attendance_percentage is under their class threshold and who
+    have not been alerted within the cooldown, fetched in a single query.
+    """
+    if cooldown_hours is None:
+        cooldown_hours = settings.ATTENDANCE_ALERT_COOLDOWN_HOURS
+
+    class_row = Class.objects.filter(
+        school_id=OuterRef('school_id'),
+        class_number=OuterRef('class_assigned')
+    )
+    recently_alerted = AttendanceAlert.objects.filter(
+        student_id=OuterRef('student_id'),
+        sent_at__gte=timezone.now() - datetime.timedelta(hours=cooldown_hours)
+    )
+
+    students = Student.objects.annotate(
+        threshold=Subquery(class_row.values('threshold')[:1]),
+        total_working_days=Subquery(class_row.values('total_working_days')[:1]),
+        present_count=Subquery(
+            AttendanceTally.objects.filter(
+                school_id=OuterRef('school_id'),
+                class_number=OuterRef('class_assigned'),
+                student_id=OuterRef('student_id')
+            ).values('present_count')[:1]
+        ),
+    ).filter(
+        attendance_percentage__lt=F('threshold'),
+        total_working_days__gt=0
+    ).exclude(
+        Exists(recently_alerted)
+    )
+
+    if school_id:
+        students = students.filter(school_id=school_id)
+    if class_number:
+        students = students.filter(class_assigned=class_number)
+
+    return students.values(
+        'student_id', 'full_name', 'email', 'school_id', 'class_assigned',
+        'attendance_percentage', 'present_count', 'total_working_days'
+    )
+
+
+def send_low_attendance_alerts(school_id=None, class_number=None, cooldown_hours=None):
+    """
+    Queues an email for every student below their class threshold in one insert
+    and records each alert. Returns the list of student_ids alerted.
+    """
+    students = list(students_below_threshold(school_id, class_number, cooldown_hours))
+    if not students:
+        return []
+
+    current_year = datetime.datetime.now().year
+    queue_email_batch(
+        ALERT_SUBJECT,
+        'emails/low_attendance_alert.html',
+        [
+            ({
+                'name': student['full_name'],
+                'student_id': student['student_id'],
+                'present_count': student['present_count'] or 0,
+                'total_working_days': student['total_working_days'],
+                'percentage': round(student['attendance_percentage'], 2),
+                'current_year': current_year
+            }, student['email'])
+            for student in students
+        ]
+    )
+
+    AttendanceAlert.objects.bulk_create([
+        AttendanceAlert(
+            student_id=student['student_id'],
+            school_id=student['school_id'],
+            class_number=student['class_assigned'],
+            present_count=student['present_count'] or 0,
+            percentage=student['attendance_percentage']
+        )
+        for student in students
+    ])
+    return [student['student_id'] for student in students]
+
+
+# Send Low Attendance Alerts for a School or Class (POST API)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def send_low_attendance_alerts_view(request):
+    school_id = request.data.get("school_id")
+    class_number = request.data.get("class_number")
+    cooldown_hours = request.data.get("cooldown_hours")
+
+    if not school_id:
+        return Response({"message": "school_id is required"}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    try:
+        cooldown_hours = int(cooldown_hours) if cooldown_hours is not None else None
+    except (TypeError, ValueError):
+        return Response({"message": "cooldown_hours must be a whole number"}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    alerted = send_low_attendance_alerts(school_id, class_number, cooldown_hours)
+
+    return Response({
+        "message": f"Low attendance alerts queued for {len(alerted)} students",
+        "students": alerted
+    }, status=http_status.HTTP_200_OK)
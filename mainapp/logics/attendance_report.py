@@ -0,0 +1,137 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status as http_status
+from ..models import AttendanceMark, Student
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from datetime import date
+import csv
+import json
+
+REPORT_CHUNK_SIZE = 2000
+
+CELL_VALUES = {
+    AttendanceMark.PRESENT: 'P',
+    AttendanceMark.ABSENT: 'A',
+    AttendanceMark.NOT_MARKED: '-',
+}
+
+
+class _Echo:
+    # csv.writer only needs write(); returning the line lets it be yielded straight away
+    def write(self, value):
+        return value
+
+
+def _report_rows(school_id, class_number, start_date, end_date, dates):
+    """
+    Yields (class_number, student_id, name, cells) per student, walking the
+    roster and the marks side by side so only one student is held at a time.
+    Both querysets use server-side cursors ordered by (class, student_id).
+    """
+    students = Student.objects.filter(school_id=school_id)
+    # Marks of students no longer on the roster (or in another class now) are left out,
+    # so every mark lines up with a roster row and the walk only compares for equality
+    marks = AttendanceMark.objects.filter(
+        Exists(Student.objects.filter(
+            school_id=OuterRef('school_id'),
+            class_assigned=OuterRef('class_number'),
+            student_id=OuterRef('student_id')
+        )),
+        school_id=school_id,
+        date__gte=start_date,
+        date__lte=end_date
+    )
+    if class_number:
+        students = students.filter(class_assigned=class_number)
+        marks = marks.filter(class_number=class_number)
+
+    students = students.order_by('class_assigned', 'student_id').values_list(
+        'class_assigned', 'student_id', 'full_name'
+    ).iterator(chunk_size=REPORT_CHUNK_SIZE)
+    marks = marks.order_by('class_number', 'student_id', 'date').values_list(
+        'class_number', 'student_id', 'date', 'status'
+    ).iterator(chunk_size=REPORT_CHUNK_SIZE)
+
+    column = {day: index for index, day in enumerate(dates)}
+    mark = next(marks, None)
+    for student_class, student_id, full_name in students:
+        key = (student_class, student_id)
+        cells = [''] * len(dates)
+
+        while mark is not None and mark[:2] == key:
+            # A mark saved on a new date after the columns were read has no column
+            index = column.get(mark[2])
+            if index is not None:
+                cells[index] = CELL_VALUES[mark[3]]
+            mark = next(marks, None)
+
+        yield student_class, student_id, full_name, cells
+
+
+def _stream_csv(rows, dates):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['class_number', 'student_id', 'name'] + [day.isoformat() for day in dates])
+    for student_class, student_id, full_name, cells in rows:
+        yield writer.writerow([student_class, student_id, full_name] + cells)
+
+
+def _stream_json(rows, dates):
+    yield '{"dates": ' + json.dumps([day.isoformat() for day in dates]) + ', "students": ['
+    separator = ''
+    for student_class, student_id, full_name, cells in rows:
+        yield separator + json.dumps({
+            "class_number": student_class,
+            "student_id": student_id,
+            "name": full_name,
+            "attendance": cells,
+        })
+        separator = ','
+    yield ']}'
+
+
+# Attendance Report (GET API)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def attendance_report(request):
+    """
+    Streams a student x date attendance matrix for a school, or one class of it.
+    Query params: school_id, start_date, optional end_date (default today),
+    optional class_number and output=json|csv (default json).
+    Cells are P (present), A (absent), - (not marked) or empty (no record).
+    """
+    school_id = request.query_params.get('school_id')
+    class_number = request.query_params.get('class_number')
+    report_format = request.query_params.get('output', 'json')
+    try:
+        start_date = parse_date(request.query_params.get('start_date') or '')
+        end_date = parse_date(request.query_params.get('end_date') or '') or date.today()
+    except ValueError:
+        return Response({"message": "start_date and end_date must be valid dates"}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    if not school_id or not start_date:
+        return Response({"message": "school_id and start_date are required"}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    if end_date < start_date:
+        return Response({"message": "end_date must not be before start_date"}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    if report_format not in ('json', 'csv'):
+        return Response({"message": "output must be json or csv"}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    # Only dates that have any attendance become columns
+    dates = AttendanceMark.objects.filter(school_id=school_id, date__gte=start_date, date__lte=end_date)
+    if class_number:
+        dates = dates.filter(class_number=class_number)
+    dates = list(dates.order_by('date').values_list('date', flat=True).distinct())
+
+    rows = _report_rows(school_id, class_number, start_date, end_date, dates)
+    file_name = f"attendance_{school_id}_{class_number or 'all'}_{start_date}_{end_date}"
+
+    if report_format == 'csv':
+        response = StreamingHttpResponse(_stream_csv(rows, dates), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename={file_name}.csv'
+    else:
+        response = StreamingHttpResponse(_stream_json(rows, dates), content_type='application/json')
+    return response
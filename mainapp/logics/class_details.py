@@ -20,7 +20,6 @@ def get_assigned_class(request):
 
     class_obj = get_object_or_404(Class, class_number=teacher.class_assigned, school_id=teacher.school_id)
 
-    class_obj.update_total_working_days()
     serializer = ClassSerializer(class_obj)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -37,9 +36,12 @@ def update_assigned_class(request):
         return Response({"error": "No class assigned to this teacher."}, status=status.HTTP_404_NOT_FOUND)
 
     class_obj = get_object_or_404(Class, class_number=teacher.class_assigned,school_id=teacher.school_id)
+    previous_start_date = class_obj.start_date
     serializer = ClassSerializer(class_obj, data=request.data)
     if serializer.is_valid():
-        serializer.save()
+        class_obj = serializer.save()
+        if class_obj.start_date != previous_start_date:
+            class_obj.update_total_working_days()
         return Response({"message": "Class Details updated successfully"}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -52,6 +54,5 @@ def get_class_details(request, class_number):
     class_obj = get_object_or_404(Class, class_number=class_number, school_id=teacher.school_id)
     print(class_obj)
 
-    class_obj.update_total_working_days()
     serializer = ClassSerializer(class_obj)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -4,7 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from ..serializers import TeacherSerializer
 from ..models import Teacher, Class
-from ..logics.email import send_email_sync
+from ..logics.email import queue_email
 from django.contrib.auth import get_user_model
 User = get_user_model()
 import os, datetime
@@ -84,7 +84,7 @@ def add_class_teacher(request):
             'current_year': datetime.datetime.now().year
         }
 
-        send_email_sync(
+        queue_email(
             subject=email_subject,
             template_name='emails/welcome_email.html',
             context=email_context,
@@ -184,7 +184,7 @@ def delete_class_teacher(request, pk):
         'current_year': datetime.datetime.now().year
     }
 
-    send_email_sync(
+    queue_email(
         subject=email_subject,
         template_name='emails/delete_teacher.html',
         context=email_context,
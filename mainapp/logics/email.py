@@ -1,29 +1,137 @@
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-import threading
-
-def send_email_sync(subject, template_name, context, recipient_email):
-    try:
-        html_content = render_to_string(template_name, context)
-        text_content = strip_tags(html_content)
-        email = EmailMultiAlternatives(
-            subject,
-            text_content,
-            'EduMet <noreply@edumet.in>',
-            [recipient_email],
-        )
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.conf import settings
+from django.db import transaction
+from ..models import OutboundEmail
+from .email_templates import get_email_template
+import datetime
+import json
+
+FROM_EMAIL = 'EduMet <noreply@edumet.in>'
+
+# A claimed email is retried after this long if its worker never reports back
+CLAIM_LEASE = datetime.timedelta(minutes=5)
+RETRY_BASE_DELAY = datetime.timedelta(seconds=30)
+RETRY_MAX_DELAY = datetime.timedelta(hours=1)
+
+def build_email(subject, template_name, context, recipient_email, connection=None):
+    html_content, text_content = get_email_template(template_name).render(context)
+    return _email_from_content(subject, html_content, text_content, recipient_email, connection)
 
-        email.attach_alternative(html_content, "text/html")
-        email.send()
-        
-    except Exception as e:
-        print(f"Email sending failed for {recipient_email}. Error: {e}")
+def _email_from_content(subject, html_content, text_content, recipient_email, connection=None):
+    email = EmailMultiAlternatives(
+        subject,
+        text_content,
+        FROM_EMAIL,
+        [recipient_email],
+        connection=connection,
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+# Contexts can carry passwords and OTPs, so they are stored encrypted like EmailOTP
+def encrypt_context(context):
+    return settings.FERNET.encrypt(json.dumps(context, cls=DjangoJSONEncoder).encode()).decode()
 
-def send_email_background(subject, template_name, context, recipient_email):
-    thread = threading.Thread(
-        target=send_email_sync,
-        args=(subject, template_name, context, recipient_email)
+def decrypt_context(context_encrypted):
+    return json.loads(settings.FERNET.decrypt(context_encrypted.encode()).decode())
+
+def queue_email(subject, template_name, context, recipient_email):
+    """
+    Adds an email to the outbox; the process_email_outbox worker sends it.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        template_name=template_name,
+        context_encrypted=encrypt_context(context),
+        recipient_email=recipient_email,
     )
-    thread.daemon = True
-    thread.start()
+
+def queue_email_batch(subject, template_name, contexts_and_recipients):
+    """
+    Adds one email per (context, recipient_email) pair to the outbox in a single insert.
+    """
+    return OutboundEmail.objects.bulk_create([
+        OutboundEmail(
+            subject=subject,
+            template_name=template_name,
+            context_encrypted=encrypt_context(context),
+            recipient_email=recipient_email,
+        )
+        for context, recipient_email in contexts_and_recipients
+    ])
+
+def claim_outbox_batch(batch_size):
+    """
+    Locks up to batch_size due emails, pushes them out by CLAIM_LEASE so no other
+    worker picks them up, and returns them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = now + CLAIM_LEASE
+        OutboundEmail.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+def process_outbox_batch(batch_size, pool, max_attempts):
+    """
+    Claims one batch and sends it through the MailConnectionPool. Failed emails
+    are retried with exponential backoff and dead-lettered after max_attempts.
+    Returns (sent, failed, dead) counts.
+    """
+    batch = claim_outbox_batch(batch_size)
+    if not batch:
+        return 0, 0, 0
+
+    # Emails of the same template are rendered together
+    by_template = {}
+    for email in batch:
+        by_template.setdefault(email.template_name, []).append(email)
+
+    results, messages = {}, {}
+    for template_name, emails in by_template.items():
+        try:
+            template = get_email_template(template_name)
+            rendered = template.render_many([decrypt_context(email.context_encrypted) for email in emails])
+        except Exception:
+            # Fall back to one at a time so a single bad context does not fail the rest
+            rendered = None
+        for index, email in enumerate(emails):
+            try:
+                if rendered is None:
+                    messages[email.id] = build_email(
+                        email.subject, template_name, decrypt_context(email.context_encrypted), email.recipient_email
+                    )
+                else:
+                    html_content, text_content = rendered[index]
+                    messages[email.id] = _email_from_content(email.subject, html_content, text_content, email.recipient_email)
+            except Exception as e:
+                results[email.id] = str(e)
+    results.update(pool.send(messages))
+
+    now = timezone.now()
+    sent = failed = dead = 0
+    for email in batch:
+        error = results.get(email.id, "Not sent")
+        if error is None:
+            email.status = OutboundEmail.SENT
+            email.sent_at = now
+            email.last_error = ""
+            sent += 1
+        elif email.attempts >= max_attempts:
+            email.status = OutboundEmail.DEAD
+            email.last_error = error
+            dead += 1
+        else:
+            email.next_attempt_at = now + min(RETRY_BASE_DELAY * 2 ** (email.attempts - 1), RETRY_MAX_DELAY)
+            email.last_error = error
+            failed += 1
+    OutboundEmail.objects.bulk_update(batch, ['status', 'sent_at', 'next_attempt_at', 'last_error'])
+    return sent, failed, dead
@@ -0,0 +1,56 @@
+from django.template import engines
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+from functools import lru_cache
+import html
+import re
+
+_HIDDEN_BLOCKS = re.compile(r'<(head|style|script)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_LINE_BREAKS = re.compile(r'<br\s*/?>|</(p|div|tr|table|h[1-6]|li)\s*>', re.IGNORECASE)
+_CELL_PAIRS = re.compile(r'</th>\s*<td[^>]*>', re.IGNORECASE)
+
+
+def text_template_source(html_source):
+    """
+    Turns the HTML template source into a plain-text template source once, so
+    the text alternative is rendered directly instead of stripping tags from
+    every rendered email.
+    """
+    source = _HIDDEN_BLOCKS.sub('', html_source)
+    source = _CELL_PAIRS.sub(': ', source)
+    source = _LINE_BREAKS.sub('\n', source)
+    text = html.unescape(strip_tags(source))
+
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return '{% autoescape off %}' + '\n'.join(lines).strip() + '\n{% endautoescape %}'
+
+
+class EmailTemplate:
+    """
+    An email template compiled once per process, with its plain-text
+    counterpart derived from the same source.
+    """
+    def __init__(self, template_name):
+        self.template_name = template_name
+        self.html_template = get_template(template_name)
+        self.text_template = engines['django'].from_string(
+            text_template_source(self.html_template.template.source)
+        )
+
+    def render(self, context):
+        """
+        Returns (html_content, text_content) for one context.
+        """
+        return self.html_template.render(context), self.text_template.render(context)
+
+    def render_many(self, contexts):
+        return [self.render(context) for context in contexts]
+
+
+@lru_cache(maxsize=None)
+def get_email_template(template_name):
+    return EmailTemplate(template_name)
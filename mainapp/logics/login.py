@@ -9,7 +9,7 @@ from ..serializers import LoginSerializer
 from rest_framework import status
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from .email import send_email_background
+from .email import queue_email
 from django.conf import settings
 from cryptography.fernet import InvalidToken
 
@@ -57,7 +57,7 @@ def login(request):
         otp = create_otp_for_user(user)
 
         context = {"otp": otp, "name": teacher.name, "current_year": timezone.now().year}
-        send_email_background(
+        queue_email(
             subject="Your EduMet Login OTP",
             template_name="emails/otp_email.html",
             context=context,
@@ -138,7 +138,7 @@ def resend_otp(request):
         "current_year": timezone.now().year
     }
 
-    send_email_background(
+    queue_email(
         subject="Your EduMet Login OTP (Resent)",
         template_name="emails/otp_email.html",
         context=context,
@@ -0,0 +1,126 @@
+from django.core.mail import get_connection
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
+
+
+class _Slot:
+    def __init__(self, index):
+        self.index = index
+        self.connection = None
+        self.last_used = 0.0
+        self.messages = 0
+        self.batches = 0
+        self.connects = 0
+        self.seconds = 0.0
+
+
+class MailConnectionPool:
+    """
+    Keeps up to `size` authenticated mail connections open and sends messages
+    over them in groups, one send_messages() call per connection. Connections
+    idle for longer than idle_timeout seconds are reopened before use, since
+    SMTP servers drop them.
+    """
+    def __init__(self, size, backend=None, idle_timeout=60):
+        self.size = max(size, 1)
+        self.backend = backend
+        self.idle_timeout = idle_timeout
+        self._slots = queue.LifoQueue()
+        self._all_slots = [_Slot(index) for index in range(self.size)]
+        for slot in self._all_slots:
+            self._slots.put(slot)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='mail-pool')
+        self._lock = threading.Lock()
+
+    def _connection(self, slot):
+        if slot.connection is not None and time.monotonic() - slot.last_used > self.idle_timeout:
+            self._drop(slot)
+        if slot.connection is None:
+            connection = get_connection(self.backend)
+            connection.open()
+            slot.connection = connection
+            slot.connects += 1
+        return slot.connection
+
+    def _drop(self, slot):
+        if slot.connection is not None:
+            try:
+                slot.connection.close()
+            except Exception:
+                pass
+            slot.connection = None
+
+    def _send_over(self, slot, group):
+        connection = self._connection(slot)
+        messages = [message for _, message in group]
+        for message in messages:
+            message.connection = connection
+        connection.send_messages(messages)
+
+    def _send_group(self, group):
+        slot = self._slots.get()
+        started = time.monotonic()
+        results = {}
+        try:
+            try:
+                self._send_over(slot, group)
+                results = {key: None for key, _ in group}
+            except Exception:
+                # One bad message fails the whole call, so resend one at a time to find it.
+                # Messages sent before the failure may be delivered twice.
+                self._drop(slot)
+                for key, message in group:
+                    try:
+                        self._send_over(slot, [(key, message)])
+                        results[key] = None
+                    except Exception as e:
+                        results[key] = str(e)
+                        self._drop(slot)
+        finally:
+            slot.last_used = time.monotonic()
+            with self._lock:
+                slot.messages += sum(1 for error in results.values() if error is None)
+                slot.batches += 1
+                slot.seconds += slot.last_used - started
+            self._slots.put(slot)
+        return results
+
+    def send(self, messages):
+        """
+        Sends {key: EmailMessage} spread across the pool's connections.
+        Returns {key: error message, or None if sent}.
+        """
+        items = list(messages.items())
+        if not items:
+            return {}
+
+        groups = [items[i::self.size] for i in range(min(self.size, len(items)))]
+        results = {}
+        for group_results in self._executor.map(self._send_group, groups):
+            results.update(group_results)
+        return results
+
+    def stats(self):
+        """
+        Messages sent, send_messages() calls, connections opened, seconds spent
+        and messages per second, for each connection slot.
+        """
+        with self._lock:
+            return [
+                {
+                    "connection": slot.index,
+                    "messages": slot.messages,
+                    "batches": slot.batches,
+                    "connects": slot.connects,
+                    "seconds": round(slot.seconds, 4),
+                    "messages_per_second": round(slot.messages / slot.seconds, 1) if slot.seconds else 0.0,
+                }
+                for slot in self._all_slots
+            ]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for slot in self._all_slots:
+            self._drop(slot)
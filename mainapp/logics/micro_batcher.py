@@ -0,0 +1,95 @@
+from django.conf import settings
+from concurrent.futures import Future
+from .model_registry import registry
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-student predictions. Callers queue a feature row
+    and wait; a background thread collects rows for up to `window` seconds or
+    `max_batch` rows, scores them in one model call and resolves each caller.
+    A window of 0 turns batching off and scores every row directly.
+    """
+    def __init__(self, window, max_batch):
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self.largest_batch_size = 0
+
+    def _ensure_worker(self):
+        # A thread does not survive a fork (e.g. gunicorn --preload), so each process starts its own
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name="predict-micro-batcher", daemon=True)
+                self._thread.start()
+
+    def predict(self, features, timeout=None):
+        """
+        Predicted final grade for one row of FEATURES values.
+        """
+        row = [float(value) for value in features]
+        if self.window <= 0:
+            return float(registry.predict_array(np.array([row]))[0])
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, future))
+        return future.result(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            grades = registry.predict_array(np.array([row for row, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), grade in zip(batch, grades):
+            future.set_result(float(grade))
+
+        self.batches += 1
+        self.items += len(batch)
+        self.last_batch_size = len(batch)
+        self.largest_batch_size = max(self.largest_batch_size, len(batch))
+
+    def metrics(self):
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "queue_depth": self._queue.qsize() if self._queue and self._pid == os.getpid() else 0,
+            "batches": self.batches,
+            "predictions": self.items,
+            "average_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "last_batch_size": self.last_batch_size,
+            "largest_batch_size": self.largest_batch_size,
+        }
+
+
+batcher = MicroBatcher(settings.PREDICT_BATCH_WINDOW_MS / 1000, settings.PREDICT_BATCH_MAX_SIZE)
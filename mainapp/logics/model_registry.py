@@ -0,0 +1,290 @@
+from django.conf import settings
+from django.utils import timezone
+import hashlib
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Student model fields in the order the grade model expects its features
+FEATURE_FIELDS = {
+    'attendance_percentage': 'Attendance_Percentage',
+    'parental_education': 'Parental_Education',
+    'study_hours': 'Study_Hours_Per_Week',
+    'failures': 'Failures',
+    'extracurricular': 'Extra_Curricular',
+    'participation': 'Participation_Score',
+    'rating': 'Teacher_Rating',
+    'discipline': 'Discipline_Issues',
+    'late_submissions': 'Late_Submissions',
+    'prev_grade1': 'Previous_Grade_1',
+    'prev_grade2': 'Previous_Grade_2',
+}
+FEATURES = list(FEATURE_FIELDS.values())
+
+
+def artifact_version(path):
+    """
+    Short content hash identifying a model artifact.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as artifact:
+        for block in iter(lambda: artifact.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class _FrameBackend:
+    """
+    Base for backends that score DataFrames; pandas is only imported once one is used.
+    """
+    def predict_array(self, features):
+        import pandas as pd
+        return self.predict_frame(pd.DataFrame(features, columns=FEATURES))
+
+
+class _ArtifactBackend(_FrameBackend):
+    """
+    A fitted estimator loaded from SPPML_MODEL_PATH with joblib.
+    """
+    engine = 'sklearn'
+
+    def __init__(self, path, mmap_mode=None):
+        import joblib
+        self.model = joblib.load(path, mmap_mode=mmap_mode)
+        self.version = artifact_version(path)
+        self.source = os.path.basename(path)
+
+    def predict_frame(self, frame):
+        return self.model.predict(frame[FEATURES])
+
+
+class _SppmlBackend(_FrameBackend):
+    """
+    sppml's own predict_bulk, used when no artifact path is configured.
+    """
+    engine = 'sppml'
+
+    def __init__(self):
+        import sppml
+        from sppml.predict import predict_bulk
+        self._predict_bulk = predict_bulk
+        self.version = getattr(sppml, '__version__', 'sppml')
+        self.source = 'sppml'
+
+    def predict_frame(self, frame):
+        result = self._predict_bulk(frame[FEATURES].copy(), from_csv=False)
+        if result is None or result.empty:
+            raise RuntimeError("Bulk prediction failed.")
+        return result['Predicted_Final_Grade'].to_numpy()
+
+
+class _NumpyBackend:
+    """
+    Parameters exported by the export_numpy_model command, evaluated with plain
+    NumPy. Reports the version of the artifact it was exported from.
+    """
+    engine = 'numpy'
+
+    def __init__(self, path):
+        from .numpy_engine import NumpyModel
+        self.model = NumpyModel(path)
+        self.version = self.model.version
+        self.source = os.path.basename(path)
+
+    def predict_array(self, features):
+        return self.model.predict(features)
+
+    def predict_frame(self, frame):
+        return self.predict_array(frame[FEATURES].to_numpy(dtype=float))
+
+
+def _default_backend():
+    # The NumPy engine is preferred when exported; scikit-learn/sppml stay the fallback
+    if settings.SPPML_NUMPY_MODEL_PATH:
+        try:
+            return _NumpyBackend(settings.SPPML_NUMPY_MODEL_PATH)
+        except Exception:
+            logger.exception("NumPy grade model unavailable, falling back to scikit-learn")
+    path = settings.SPPML_MODEL_PATH
+    return _ArtifactBackend(path, settings.SPPML_MODEL_MMAP_MODE) if path else _SppmlBackend()
+
+
+def build_backend(path=None):
+    """
+    A warmed-up backend for a model artifact: exported NumPy parameters (.npz)
+    or a joblib estimator. Without a path, the model configured in settings.
+    """
+    if not path:
+        backend = _default_backend()
+    elif path.endswith('.npz'):
+        backend = _NumpyBackend(path)
+    else:
+        backend = _ArtifactBackend(path, settings.SPPML_MODEL_MMAP_MODE)
+    backend.predict_array(np.zeros((1, len(FEATURES))))
+    return backend
+
+
+class ShadowScorer:
+    """
+    Scores a sample of live batches with a candidate model on a background
+    thread, off the request path, and hands (rows, primary_ms, shadow_ms,
+    mean_abs_diff, max_abs_diff) to `record`. Batches are dropped rather than
+    queued once max_pending are waiting.
+    """
+    def __init__(self, backend, sample_rate, record, max_pending=100):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.record = record
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self.compared = 0
+        self.dropped = 0
+
+    def offer(self, features, grades, primary_seconds):
+        if random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._queue = queue.Queue(self.max_pending)
+                self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((np.array(features, dtype=float), np.asarray(grades, dtype=float), primary_seconds))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            features, grades, primary_seconds = self._queue.get()
+            try:
+                started = time.perf_counter()
+                shadow_grades = np.asarray(self.backend.predict_array(features), dtype=float)
+                shadow_seconds = time.perf_counter() - started
+                differences = np.abs(shadow_grades - grades)
+                self.record(len(features), primary_seconds * 1000, shadow_seconds * 1000,
+                            float(differences.mean()), float(differences.max()))
+                self.compared += 1
+            except Exception:
+                logger.exception("Shadow scoring failed")
+
+
+class ModelRegistry:
+    """
+    Holds the grade model for this process. The model is loaded once, warmed
+    up with a prediction, and shared by every request. A new model is built
+    and warmed beside the current one and then swapped in with a single
+    assignment, so requests never wait for a load or see a half-loaded model.
+    """
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+        # Artifact the current model came from; None means the one configured in settings
+        self.path = None
+        self.shadow = None
+        self.loaded_at = None
+        self.load_seconds = None
+        # Last failed load per role ('active', 'shadow'); kept while a fallback model
+        # serves, and cleared once the same artifact loads
+        self.load_errors = {}
+
+    def _built(self, role, path):
+        try:
+            backend = build_backend(path)
+        except Exception as e:
+            self.load_errors[role] = {"path": path, "error": str(e), "at": timezone.now()}
+            raise
+        if role in self.load_errors and self.load_errors[role]["path"] == path:
+            del self.load_errors[role]
+        return backend
+
+    @property
+    def loaded(self):
+        return self._backend is not None
+
+    def load(self, path=None):
+        with self._lock:
+            started = time.perf_counter()
+            backend = self._built('active', path)
+            self._backend = backend
+            self.path = path
+            self.load_seconds = time.perf_counter() - started
+            self.loaded_at = timezone.now()
+        return backend
+
+    def set_shadow(self, path, sample_rate, record):
+        self.shadow = ShadowScorer(self._built('shadow', path), sample_rate, record)
+
+    def clear_shadow(self):
+        self.shadow = None
+
+    @property
+    def backend(self):
+        return self._backend or self.load()
+
+    @property
+    def version(self):
+        return self.backend.version
+
+    def info(self):
+        backend = self.backend
+        shadow = self.shadow
+        return {
+            "version": backend.version,
+            "engine": backend.engine,
+            "source": backend.source,
+            "mmap_mode": settings.SPPML_MODEL_MMAP_MODE if backend.engine == 'sklearn' else None,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+            "shadow": {
+                "version": shadow.backend.version,
+                "sample_rate": shadow.sample_rate,
+                "compared": shadow.compared,
+                "dropped": shadow.dropped,
+            } if shadow else None,
+            "load_errors": dict(self.load_errors),
+        }
+
+    def predict_array(self, features):
+        """
+        Predicted final grades for an (n, len(FEATURES)) array, in one model call.
+        """
+        backend, shadow = self.backend, self.shadow
+        started = time.perf_counter()
+        grades = backend.predict_array(features)
+        if shadow:
+            shadow.offer(features, grades, time.perf_counter() - started)
+        return grades
+
+
+registry = ModelRegistry()
+
+
+def init_scoring_process(path=None):
+    """
+    ProcessPoolExecutor initializer: sets Django up in a spawned worker and
+    loads the given model (the parent's) once for the life of the process.
+    """
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+    if registry.path != path or not registry.loaded:
+        registry.load(path)
+
+
+def score_partition(features):
+    """
+    Scores one partition inside a pool worker, returning (model_version, grades).
+    Kept free of model/ORM imports so worker processes never touch the database.
+    """
+    return registry.version, registry.predict_array(features).tolist()
@@ -0,0 +1,153 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from ..models import ModelRelease, ShadowComparison
+from .model_registry import registry
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Avg, Count, Max
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _shadow_recorder(release):
+    def record(rows, primary_ms, shadow_ms, mean_abs_diff, max_abs_diff):
+        try:
+            ShadowComparison.objects.create(
+                release_id=release.id,
+                primary_version=registry.version,
+                rows=rows,
+                primary_ms=primary_ms,
+                shadow_ms=shadow_ms,
+                mean_abs_diff=mean_abs_diff,
+                max_abs_diff=max_abs_diff
+            )
+        finally:
+            # Runs on the shadow thread, which no request cycle cleans up after
+            close_old_connections()
+    return record
+
+
+class ReleaseWatcher:
+    """
+    Keeps this process's model in line with the deployed ModelRelease rows,
+    checking at most every `interval` seconds. With no active release it
+    watches the configured model file instead and reloads when it is replaced.
+    New models are loaded on a background thread and swapped in once warm.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._checked_at = None
+        self._loading = set()
+        self._lock = threading.Lock()
+        self._watched_mtime = None
+        self._shadow_key = None
+
+    def _default_file_changed(self):
+        path = settings.SPPML_NUMPY_MODEL_PATH or settings.SPPML_MODEL_PATH
+        if not path or not os.path.exists(path):
+            return False
+        mtime = os.stat(path).st_mtime
+        changed = self._watched_mtime is not None and mtime != self._watched_mtime
+        self._watched_mtime = mtime
+        return changed
+
+    def _run(self, kind, load, background):
+        with self._lock:
+            if kind in self._loading:
+                return
+            self._loading.add(kind)
+
+        def task():
+            try:
+                load()
+            except Exception:
+                # Kept in registry.load_errors for modelInfo/; the next check tries again
+                logger.exception(f"Loading the {kind} model failed")
+            finally:
+                self._loading.discard(kind)
+
+        if background:
+            threading.Thread(target=task, name=f"{kind}-model-loader", daemon=True).start()
+        else:
+            task()
+
+    def check(self, force=False, background=True):
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.interval:
+            return
+        # The first check of a process (when nothing checked at startup) loads in the
+        # foreground, so its first request is already served by the deployed release
+        if self._checked_at is None:
+            background = False
+        self._checked_at = now
+
+        releases = {
+            release.role: release
+            for release in ModelRelease.objects.filter(role__in=[ModelRelease.ACTIVE, ModelRelease.SHADOW])
+        }
+        active = releases.get(ModelRelease.ACTIVE)
+        shadow = releases.get(ModelRelease.SHADOW)
+
+        target = active.path if active else None
+        # Failures of artifacts no longer deployed stop being reported
+        for role, path in (('active', target), ('shadow', shadow.path if shadow else None)):
+            if registry.load_errors.get(role, {}).get('path', path) != path:
+                registry.load_errors.pop(role, None)
+
+        if target != registry.path or (target is None and self._default_file_changed()):
+            self._run('active', lambda: registry.load(target), background)
+
+        shadow_key = (shadow.id, shadow.shadow_sample_rate) if shadow else None
+        if shadow_key != self._shadow_key:
+            if shadow:
+                def load_shadow():
+                    registry.set_shadow(shadow.path, shadow.shadow_sample_rate, _shadow_recorder(shadow))
+                    self._shadow_key = shadow_key
+                self._run('shadow', load_shadow, background)
+            else:
+                registry.clear_shadow()
+                self._shadow_key = None
+
+
+release_watcher = ReleaseWatcher(settings.SPPML_RELEASE_CHECK_SECONDS)
+
+
+# Shadow Report (GET API)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def shadow_report(request):
+    """
+    Latency and prediction differences recorded for a shadow release.
+    Query params: optional release_id (default: the current or most recent shadow release).
+    """
+    release_id = request.query_params.get("release_id")
+    if release_id:
+        release = ModelRelease.objects.filter(id=release_id).first()
+    else:
+        release = (
+            ModelRelease.objects.filter(role=ModelRelease.SHADOW).first()
+            or ModelRelease.objects.filter(shadow_comparisons__isnull=False).order_by('-created_at').first()
+        )
+    if not release:
+        return Response({"error": "No shadow release found."}, status=status.HTTP_404_NOT_FOUND)
+
+    summary = release.shadow_comparisons.aggregate(
+        batches=Count('id'),
+        primary_ms=Avg('primary_ms'),
+        shadow_ms=Avg('shadow_ms'),
+        mean_abs_diff=Avg('mean_abs_diff'),
+        max_abs_diff=Max('max_abs_diff')
+    )
+    return Response({
+        "release_id": release.id,
+        "version": release.version,
+        "role": release.role,
+        "sample_rate": release.shadow_sample_rate,
+        **summary,
+    }, status=status.HTTP_200_OK)
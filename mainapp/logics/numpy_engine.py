@@ -0,0 +1,138 @@
+"""
+Plain-NumPy evaluation of the grade model.
+
+export_params() flattens a fitted scikit-learn regressor into a handful of arrays
+(saved once with save_params as a compressed .npz), and NumpyModel evaluates them
+without importing pandas or scikit-learn. Supported estimators are linear models
+(anything with a 1-D coef_ and intercept_), DecisionTreeRegressor,
+RandomForestRegressor, ExtraTreesRegressor and GradientBoostingRegressor,
+optionally behind a StandardScaler in a Pipeline.
+"""
+import numpy as np
+
+LINEAR = 'linear'
+TREES = 'trees'
+
+
+def _scaler_params(scaler):
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+    return {'scaler_mean': np.asarray(mean, dtype=np.float64), 'scaler_scale': np.asarray(scale, dtype=np.float64)}
+
+
+def _tree_params(trees, base, scale):
+    """
+    Concatenates the trees' node arrays, with child indices made global so
+    every tree can be walked over the same arrays.
+    """
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        nodes = tree.tree_
+        is_leaf = nodes.children_left == -1
+        roots.append(offset)
+        left.append(np.where(is_leaf, -1, nodes.children_left + offset))
+        right.append(np.where(is_leaf, -1, nodes.children_right + offset))
+        feature.append(np.where(is_leaf, 0, nodes.feature))
+        threshold.append(nodes.threshold)
+        value.append(nodes.value.reshape(-1))
+        offset += nodes.node_count
+
+    return {
+        'kind': np.array(TREES),
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': np.array(roots, dtype=np.int32),
+        'base': np.float64(base),
+        'scale': np.float64(scale),
+    }
+
+
+def export_params(model):
+    """
+    Arrays describing a fitted regressor. Raises ValueError for estimators
+    this engine cannot evaluate.
+    """
+    params = {}
+    steps = getattr(model, 'steps', None)
+    if steps:
+        for name, step in steps[:-1]:
+            if type(step).__name__ != 'StandardScaler' or params:
+                raise ValueError(f"Unsupported pipeline step '{name}' ({type(step).__name__}).")
+            params.update(_scaler_params(step))
+        model = steps[-1][1]
+
+    name = type(model).__name__
+    if name in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+        params.update(_tree_params(model.estimators_, 0.0, 1.0 / len(model.estimators_)))
+    elif name == 'DecisionTreeRegressor':
+        params.update(_tree_params([model], 0.0, 1.0))
+    elif name == 'GradientBoostingRegressor':
+        if model.init_ == 'zero':
+            base = 0.0
+        elif type(model.init_).__name__ == 'DummyRegressor':
+            base = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise ValueError("GradientBoostingRegressor with a custom init estimator is not supported.")
+        params.update(_tree_params(model.estimators_[:, 0], base, model.learning_rate))
+    elif np.ndim(getattr(model, 'coef_', None)) == 1:
+        params.update({
+            'kind': np.array(LINEAR),
+            'coef': np.asarray(model.coef_, dtype=np.float64),
+            'intercept': np.float64(model.intercept_),
+        })
+    else:
+        raise ValueError(f"Unsupported estimator {name}.")
+    return params
+
+
+def save_params(path, params, version):
+    with open(path, 'wb') as output:
+        np.savez_compressed(output, version=np.array(version), **params)
+
+
+class NumpyModel:
+    """
+    Evaluates exported parameters on an (n, n_features) array.
+    """
+    def __init__(self, path):
+        with np.load(path) as arrays:
+            params = {name: arrays[name] for name in arrays.files}
+        self.version = str(params.pop('version'))
+        self.kind = str(params.pop('kind'))
+        self.params = params
+
+    def predict(self, features):
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+
+        params = self.params
+        if 'scaler_mean' in params:
+            features = (features - params['scaler_mean']) / params['scaler_scale']
+
+        if self.kind == LINEAR:
+            return features @ params['coef'] + params['intercept']
+        return self._predict_trees(features)
+
+    def _predict_trees(self, features):
+        params = self.params
+        left, right, feature, threshold = params['left'], params['right'], params['feature'], params['threshold']
+        # scikit-learn's trees compare float32 copies of the features
+        features = features.astype(np.float32)
+        rows = np.arange(len(features))[:, None]
+
+        # Every (row, tree) pair walks down one level per step until all sit on leaves
+        node = np.broadcast_to(params['roots'], (len(features), len(params['roots']))).copy()
+        while True:
+            active = left[node] != -1
+            if not active.any():
+                break
+            go_left = features[rows, feature[node]] <= threshold[node]
+            node = np.where(active, np.where(go_left, left[node], right[node]), node)
+
+        return params['base'] + params['scale'] * params['value'][node].sum(axis=1)
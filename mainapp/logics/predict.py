@@ -2,94 +2,171 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from sppml.predict import predict_single, predict_bulk
 from ..models import Student, Teacher
+from .model_registry import registry, FEATURE_FIELDS, FEATURES
+from .micro_batcher import batcher
+from .sampling import sample_students
+from .prediction_cache import prediction_cache
+from .prediction_history import record_predictions
 from rest_framework.parsers import MultiPartParser
-import pandas as pd
-import io
+from django.http import StreamingHttpResponse
+import numpy as np
+import itertools
+import json
+import math
+
+PREDICT_UPDATE_BATCH_SIZE = 1000
+PREDICT_CSV_CHUNK_SIZE = 5000
+WHAT_IF_MAX_GRID = 10000
+
+
+def save_final_grades(school_id, grades_by_student_id, features_by_student_id, model_version):
+    """
+    Writes {student_id: final_grade} for one school with a single lookup and
+    batched bulk updates, and appends the matched students' predictions to
+    their history. Returns (matched, unmatched) student IDs.
+    """
+    students = {
+        student_id: (pk, class_number)
+        for student_id, pk, class_number in Student.objects.filter(
+            school_id=school_id, student_id__in=list(grades_by_student_id)
+        ).values_list('student_id', 'pk', 'class_assigned')
+    }
+    Student.objects.bulk_update(
+        [Student(pk=pk, final_grade=grades_by_student_id[student_id]) for student_id, (pk, _) in students.items()],
+        ['final_grade'],
+        batch_size=PREDICT_UPDATE_BATCH_SIZE
+    )
+    record_predictions(
+        (
+            (student_id, school_id, class_number, features_by_student_id[student_id], grades_by_student_id[student_id])
+            for student_id, (_, class_number) in students.items()
+        ),
+        model_version
+    )
+
+    matched = [student_id for student_id in grades_by_student_id if student_id in students]
+    unmatched = [student_id for student_id in grades_by_student_id if student_id not in students]
+    return matched, unmatched
+
+
+def _score_csv_chunks(school_id, reader):
+    """
+    Scores and saves each chunk of a chunked CSV reader, yielding
+    (student_ids, grades, matched, unmatched) per chunk so only one chunk
+    is in memory at a time.
+    """
+    for chunk in reader:
+        # Rename the CSV columns to the model's feature names
+        chunk = chunk.rename(columns=FEATURE_FIELDS)
+        features = chunk[FEATURES].to_numpy(dtype=float)
+        grades = [float(grade) for grade in registry.predict_array(features)]
+        student_ids = chunk['student_id'].astype(str).tolist()
+        matched, unmatched = save_final_grades(
+            school_id, dict(zip(student_ids, grades)), dict(zip(student_ids, features)), registry.version
+        )
+        yield student_ids, grades, matched, unmatched
+
+
+def _stream_json(chunks):
+    """
+    The output=json response written as it is scored: the "data" rows a chunk
+    at a time, then the matched/unmatched student IDs and the message, so only
+    IDs are held for the whole file.
+    """
+    total = 0
+    matched, unmatched = [], []
+    yield '{"data": ['
+    separator = ''
+    try:
+        for student_ids, grades, chunk_matched, chunk_unmatched in chunks:
+            rows = [json.dumps({"student_id": student_id, "final_grade": grade}) for student_id, grade in zip(student_ids, grades)]
+            if rows:
+                yield separator + ','.join(rows)
+                separator = ','
+            total += len(student_ids)
+            matched.extend(chunk_matched)
+            unmatched.extend(chunk_unmatched)
+    except Exception as e:
+        # Headers are already sent, so a failure mid-file is reported in-band
+        yield '], ' + json.dumps({"error": str(e), "processed": total})[1:]
+        return
+    yield '], ' + json.dumps({
+        "matched": matched,
+        "unmatched": unmatched,
+        "message": f"Successfully predicted grades for {len(matched)}/{total} students",
+    })[1:]
+
+
+def _stream_ndjson(chunks):
+    total = matched_count = 0
+    try:
+        for student_ids, grades, matched, unmatched in chunks:
+            matched = set(matched)
+            for student_id, grade in zip(student_ids, grades):
+                yield json.dumps({"student_id": student_id, "final_grade": grade, "matched": student_id in matched}) + '\n'
+            total += len(student_ids)
+            matched_count += len(matched)
+    except Exception as e:
+        # Headers are already sent, so a failure mid-file is reported in-band
+        yield json.dumps({"error": str(e), "processed": total}) + '\n'
+        return
+    yield json.dumps({"summary": {"total": total, "matched": matched_count, "unmatched": total - matched_count}}) + '\n'
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser])
 def predict_bulk_final_grades(request):
+    """
+    Predicts and saves final grades from an uploaded CSV, read in chunks of
+    PREDICT_CSV_CHUNK_SIZE rows. Query params: school_id and optional
+    output=json|summary|ndjson (default json). json is streamed as the chunks
+    are scored; summary leaves out per-student results; ndjson streams one
+    line per student followed by a summary line.
+    """
     school_id = request.query_params.get("school_id")
+    output = request.query_params.get("output", "json")
     if not school_id:
         return Response({"error": "school_id is required."}, status=status.HTTP_400_BAD_REQUEST)
 
+    if output not in ("json", "summary", "ndjson"):
+        return Response({"error": "output must be json, summary or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+
     if 'file' not in request.FILES:
         return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
-    
+
     csv_file = request.FILES['file']
-    
+    # Only CSV uploads need pandas, so it is not imported with the URLconf
+    import pandas as pd
+
     try:
-        # Read the CSV file into a DataFrame
-        df = pd.read_csv(io.StringIO(csv_file.read().decode('utf-8')))
-        
-        # Map the CSV columns to the expected feature names
-        column_mapping = {
-            'attendance_percentage': 'Attendance_Percentage',
-            'parental_education': 'Parental_Education',
-            'study_hours': 'Study_Hours_Per_Week',
-            'failures': 'Failures',
-            'extracurricular': 'Extra_Curricular',
-            'participation': 'Participation_Score',
-            'rating': 'Teacher_Rating',
-            'discipline': 'Discipline_Issues',
-            'late_submissions': 'Late_Submissions',
-            'prev_grade1': 'Previous_Grade_1',
-            'prev_grade2': 'Previous_Grade_2'
-        }
-        
-        # Rename columns and keep only the ones we need
-        df = df.rename(columns=column_mapping)
-        features = [
-            'Attendance_Percentage',
-            'Parental_Education',
-            'Study_Hours_Per_Week',
-            'Failures',
-            'Extra_Curricular',
-            'Participation_Score',
-            'Teacher_Rating',
-            'Discipline_Issues',
-            'Late_Submissions',
-            'Previous_Grade_1',
-            'Previous_Grade_2'
-        ]
-        
-        prediction_df = df[features].copy()
-        
-        # Call the predict_bulk function
-        result_df = predict_bulk(prediction_df, from_csv=False)
-        
-        if result_df.empty:
-            return Response({"error": "Bulk prediction failed."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-        # Update final_grade with predicted values instead of creating new column
-        df["final_grade"] = result_df["Predicted_Final_Grade"]
-
-        # Save predictions to database
-        success_count = 0
-        for _, row in df.iterrows():
-            try:
-                student = Student.objects.get(
-                    student_id=row['student_id'],
-                    school_id=school_id
-                )
-                student.final_grade = row['final_grade']
-                student.save()
-                success_count += 1
-            except Student.DoesNotExist:
-                continue
-        
-        # Convert the DataFrame to a list of dictionaries for the response
-        response_data = df.to_dict('records')
-        
+        # Read the uploaded file in place, a chunk at a time
+        reader = pd.read_csv(csv_file, chunksize=PREDICT_CSV_CHUNK_SIZE, encoding='utf-8')
+        chunks = _score_csv_chunks(school_id, reader)
+
+        if output == "ndjson":
+            return StreamingHttpResponse(_stream_ndjson(chunks), content_type='application/x-ndjson')
+
+        if output == "json":
+            # The first chunk is scored before responding, so a file the model cannot read still gets an error status
+            first_chunk = next(chunks, None)
+            chunks = itertools.chain([first_chunk] if first_chunk else [], chunks)
+            return StreamingHttpResponse(_stream_json(chunks), content_type='application/json')
+
+        total = 0
+        matched, unmatched = [], []
+        for chunk_ids, chunk_grades, chunk_matched, chunk_unmatched in chunks:
+            total += len(chunk_ids)
+            matched.extend(chunk_matched)
+            unmatched.extend(chunk_unmatched)
+
         return Response({
-            "message": f"Successfully predicted grades for {success_count}/{len(df)} students",
-            "data": response_data
+            "message": f"Successfully predicted grades for {len(matched)}/{total} students",
+            "unmatched": unmatched,
+            "matched_count": len(matched),
         }, status=status.HTTP_200_OK)
-        
+
     except pd.errors.EmptyDataError:
         return Response({"error": "The CSV file is empty."}, status=status.HTTP_400_BAD_REQUEST)
     except pd.errors.ParserError:
@@ -109,27 +186,22 @@ def predict_final_grade(request):
     try:
         student = Student.objects.get(student_id=student_id)
 
-        student_data = {
-            "Attendance_Percentage": student.attendance_percentage,
-            "Parental_Education": student.parental_education,
-            "Study_Hours_Per_Week": student.study_hours,
-            "Failures": student.failures,
-            "Extra_Curricular": student.extracurricular,
-            "Participation_Score": student.participation,
-            "Teacher_Rating": student.rating,
-            "Discipline_Issues": student.discipline,
-            "Late_Submissions": student.late_submissions,
-            "Previous_Grade_1": student.prev_grade1,
-            "Previous_Grade_2": student.prev_grade2
-        }
-        
-        prediction = predict_single(student_data)
-        
+        features = [getattr(student, field) for field in FEATURE_FIELDS]
+        fingerprint = prediction_cache.fingerprint(features)
+        prediction = prediction_cache.get(student.student_id, fingerprint)
         if prediction is None:
-            return Response({"error": "Prediction failed."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Scored together with any other predictStudent/ requests arriving at the same moment
+            prediction = batcher.predict(features)
+            prediction_cache.set(student.student_id, fingerprint, prediction)
+            record_predictions(
+                [(student.student_id, student.school_id, student.class_assigned, features, prediction)],
+                registry.version
+            )
 
-        student.final_grade = prediction
-        student.save()
+        # Unchanged students are served without a write
+        if student.final_grade != prediction:
+            student.final_grade = prediction
+            student.save(update_fields=['final_grade'])
 
         student_details = {
             "student_id": student.student_id,
@@ -156,6 +228,139 @@ def predict_final_grade(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Predict Class Final Grades (POST API)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def predict_class_final_grades(request):
+    """
+    Predicts and saves the final_grade of every student in the given class_number
+    and school_id from their stored features, with one query, at most one model
+    call and one bulk update of the grades that changed.
+    """
+    school_id = request.query_params.get("school_id")
+    class_number = request.query_params.get("class_number")
+
+    if not school_id or not class_number:
+        return Response(
+            {"error": "Both 'school_id' and 'class_number' query parameters are required."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    rows = list(
+        Student.objects.filter(school_id=school_id, class_assigned=class_number)
+        .order_by('student_id')
+        .values_list('pk', 'student_id', 'final_grade', *FEATURE_FIELDS)
+    )
+    if not rows:
+        return Response({"error": "No students found in this class."}, status=status.HTTP_404_NOT_FOUND)
+
+    # Students whose features have not changed since their last prediction are not re-scored
+    fingerprints = {row[1]: prediction_cache.fingerprint(row[3:]) for row in rows}
+    grades = prediction_cache.get_many(fingerprints)
+    to_score = [row for row in rows if row[1] not in grades]
+    if to_score:
+        try:
+            predictions = registry.predict_array(np.array([row[3:] for row in to_score], dtype=float))
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        scored = {row[1]: float(grade) for row, grade in zip(to_score, predictions)}
+        prediction_cache.set_many({student_id: (fingerprints[student_id], grade) for student_id, grade in scored.items()})
+        record_predictions(
+            ((row[1], school_id, class_number, row[3:], scored[row[1]]) for row in to_score),
+            registry.version
+        )
+        grades.update(scored)
+
+    # Only grades that differ from the stored ones are written
+    changed = [Student(pk=row[0], final_grade=grades[row[1]]) for row in rows if row[2] != grades[row[1]]]
+    Student.objects.bulk_update(changed, ['final_grade'], batch_size=PREDICT_UPDATE_BATCH_SIZE)
+
+    return Response({
+        "message": f"Successfully predicted grades for {len(rows)} students.",
+        "scored": len(to_score),
+        "updated": len(changed),
+        "data": [{"student_id": row[1], "final_grade": grades[row[1]]} for row in rows]
+    }, status=status.HTTP_200_OK)
+
+
+def _sweep_values(spec):
+    """
+    Values of one swept feature: an explicit {"values": [...]} list, or
+    {"min", "max", "steps"} spaced evenly (steps defaults to 10). Sizes are
+    checked against WHAT_IF_MAX_GRID before anything is allocated.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("each swept feature needs min/max/steps or values")
+    if "values" in spec:
+        values = spec["values"]
+        if not isinstance(values, list) or any(isinstance(value, (list, dict)) for value in values):
+            raise ValueError("values must be a list of numbers")
+        count = len(values)
+    else:
+        count = int(spec.get("steps", 10))
+    if not 0 < count <= WHAT_IF_MAX_GRID:
+        raise ValueError(f"each swept feature needs between 1 and {WHAT_IF_MAX_GRID} values")
+
+    if "values" in spec:
+        return np.array(values, dtype=float)
+    return np.linspace(float(spec["min"]), float(spec["max"]), count)
+
+
+# What-If Sweep (POST API)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def what_if_sweep(request):
+    """
+    Predicted grade surface for one student while some features vary.
+    Body: {"student_id": ..., "vary": {field: {"min", "max", "steps"} or {"values": [...]}}}
+    with fields named as on Student (e.g. study_hours). Every combination is
+    scored in one model call; nothing is saved.
+    """
+    student_id = request.data.get("student_id")
+    vary = request.data.get("vary")
+    if not student_id or not isinstance(vary, dict) or not vary:
+        return Response({"error": "student_id and at least one feature in 'vary' are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    unknown = [field for field in vary if field not in FEATURE_FIELDS]
+    if unknown:
+        return Response({"error": f"Unknown features: {', '.join(unknown)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        axes = {field: _sweep_values(spec) for field, spec in vary.items()}
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        return Response({"error": f"Invalid range: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    shape = tuple(len(values) for values in axes.values())
+    # math.prod, since the product of several axes can overflow NumPy's int64
+    if math.prod(shape) > WHAT_IF_MAX_GRID:
+        return Response({"error": f"The sweep has {math.prod(shape)} points; the limit is {WHAT_IF_MAX_GRID}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    student = Student.objects.filter(student_id=student_id).values_list(*FEATURE_FIELDS).first()
+    if student is None:
+        return Response({"error": "Student not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    # One row per grid point, starting from the student's own features; the
+    # unchanged student is scored as the last row of the same call
+    base = np.array(student, dtype=float)
+    grid = np.tile(base, (math.prod(shape) + 1, 1))
+    columns = list(FEATURE_FIELDS)
+    for values, field in zip(np.meshgrid(*axes.values(), indexing='ij'), axes):
+        grid[:-1, columns.index(field)] = values.ravel()
+
+    try:
+        grades = np.asarray(registry.predict_array(grid), dtype=float)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        "student_id": student_id,
+        "current_grade": float(grades[-1]),
+        "axes": {field: values.tolist() for field, values in axes.items()},
+        # Nested in the order of "axes": grades[i][j] is axis 1 value i with axis 2 value j
+        "grades": grades[:-1].reshape(shape).tolist(),
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def reset_final_grades(request):
@@ -195,28 +400,20 @@ def predict_random_student_grade(request):
         return Response({"error": "Only teachers can access this API."}, status=status.HTTP_403_FORBIDDEN)
     
     # Get the data from the request
-    student_data = {
-        "Attendance_Percentage": request.data.get("Attendance_Percentage"),
-        "Parental_Education": request.data.get("Parental_Education"),
-        "Study_Hours_Per_Week": request.data.get("Study_Hours_Per_Week"),
-        "Failures": request.data.get("Failures"),
-        "Extra_Curricular": request.data.get("Extra_Curricular"),
-        "Participation_Score": request.data.get("Participation_Score"),
-        "Teacher_Rating": request.data.get("Teacher_Rating"),
-        "Discipline_Issues": request.data.get("Discipline_Issues"),
-        "Late_Submissions": request.data.get("Late_Submissions"),
-        "Previous_Grade_1": request.data.get("Previous_Grade_1"),
-        "Previous_Grade_2": request.data.get("Previous_Grade_2")
-    }
+    features = [request.data.get(feature) for feature in FEATURES]
 
     # Predict the grade using the provided data
-    prediction = predict_single(student_data)
+    try:
+        prediction = batcher.predict(features)
+    except Exception:
+        return Response({"error": "Prediction failed."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # Select a random student (for the sake of this example)
-    random_student = Student.objects.filter(school_id=teacher.school_id).order_by("?").first()
+    sampled = sample_students(teacher.school_id)
 
-    if not random_student:
+    if not sampled:
         return Response({"error": "No students found in the system."}, status=status.HTTP_404_NOT_FOUND)
+    random_student = sampled[0]
 
     # Prepare the response data
     student_details = {
@@ -238,3 +435,22 @@ def predict_random_student_grade(request):
         "message": "Successfully predicted the grade for a random student.",
         "data": student_details
     }, status=status.HTTP_200_OK)
+
+
+# Model Info (GET API)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def model_info(request):
+    """
+    Version and load time of the grade model serving this process, and the
+    predictStudent/ micro-batcher's queue depth and batch sizes, the
+    prediction cache's hit rate, and the last failed model load, if any.
+    """
+    try:
+        return Response({
+            **registry.info(),
+            "batcher": batcher.metrics(),
+            "cache": prediction_cache.metrics(),
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({"error": str(e), "load_errors": registry.load_errors}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
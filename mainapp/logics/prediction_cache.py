@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.cache import caches
+from collections import OrderedDict
+from .model_registry import registry
+import hashlib
+import threading
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Last predicted grade per student, stored with a fingerprint (hash of the
+    model version and the student's feature vector). A lookup only hits when
+    the fingerprint still matches, so a student whose features or model have
+    changed is always re-scored. Entries live in an in-process LRU and, when
+    PREDICTION_CACHE_ALIAS names a Django cache, in that shared cache too.
+    """
+    def __init__(self, size, alias='', timeout=None):
+        self.size = size
+        self.alias = alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    @staticmethod
+    def _key(student_id):
+        return f"prediction:{student_id}"
+
+    def fingerprint(self, features):
+        digest = hashlib.sha1(registry.version.encode())
+        digest.update(np.asarray(features, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _remember_locally(self, student_id, entry):
+        with self._lock:
+            self._entries[student_id] = entry
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def get_many(self, fingerprints):
+        """
+        {student_id: grade} for the students of {student_id: fingerprint} whose
+        cached fingerprint still matches.
+        """
+        found = {}
+        with self._lock:
+            for student_id in fingerprints:
+                entry = self._entries.get(student_id)
+                if entry is not None:
+                    self._entries.move_to_end(student_id)
+                    found[student_id] = entry
+
+        missing = [student_id for student_id in fingerprints if student_id not in found]
+        if missing and self.shared is not None:
+            shared_entries = self.shared.get_many([self._key(student_id) for student_id in missing])
+            for student_id in missing:
+                entry = shared_entries.get(self._key(student_id))
+                if entry is not None:
+                    found[student_id] = entry
+                    self._remember_locally(student_id, entry)
+
+        grades = {
+            student_id: grade
+            for student_id, (fingerprint, grade) in found.items()
+            if fingerprint == fingerprints[student_id]
+        }
+        self.hits += len(grades)
+        self.misses += len(fingerprints) - len(grades)
+        return grades
+
+    def get(self, student_id, fingerprint):
+        return self.get_many({student_id: fingerprint}).get(student_id)
+
+    def set_many(self, entries):
+        """
+        Stores {student_id: (fingerprint, grade)}.
+        """
+        for student_id, entry in entries.items():
+            self._remember_locally(student_id, entry)
+        if entries and self.shared is not None:
+            self.shared.set_many({self._key(student_id): entry for student_id, entry in entries.items()}, self.timeout)
+
+    def set(self, student_id, fingerprint, grade):
+        self.set_many({student_id: (fingerprint, grade)})
+
+    def forget(self, student_ids):
+        """
+        Drops the entries of students whose features changed.
+        """
+        student_ids = list(student_ids)
+        with self._lock:
+            for student_id in student_ids:
+                self._entries.pop(student_id, None)
+        if student_ids and self.shared is not None:
+            self.shared.delete_many([self._key(student_id) for student_id in student_ids])
+
+    def metrics(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_backend": self.alias or None,
+        }
+
+
+prediction_cache = PredictionCache(
+    settings.PREDICTION_CACHE_SIZE,
+    settings.PREDICTION_CACHE_ALIAS,
+    settings.PREDICTION_CACHE_TIMEOUT
+)
@@ -0,0 +1,117 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from ..models import PredictionHistory
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+from datetime import datetime, time
+import hashlib
+import numpy as np
+
+HISTORY_BATCH_SIZE = 1000
+HISTORY_PAGE_SIZE = 1000
+
+
+def feature_hash(features):
+    """
+    16-hex-digit hash of one row of feature values.
+    """
+    return hashlib.blake2b(np.asarray(features, dtype=np.float64).tobytes(), digest_size=8).hexdigest()
+
+
+def record_predictions(predictions, model_version):
+    """
+    Appends (student_id, school_id, class_number, features, final_grade) rows
+    to the prediction history with one bulk insert per batch.
+    """
+    predicted_at = timezone.now()
+    PredictionHistory.objects.bulk_create(
+        [
+            PredictionHistory(
+                student_id=student_id,
+                school_id=school_id,
+                class_number=class_number,
+                predicted_at=predicted_at,
+                model_version=model_version,
+                final_grade=final_grade,
+                feature_hash=feature_hash(features)
+            )
+            for student_id, school_id, class_number, features, final_grade in predictions
+        ],
+        batch_size=HISTORY_BATCH_SIZE
+    )
+
+
+def _parse_moment(value):
+    # A bare date means the start of that day; None for anything that is not a real date or datetime
+    try:
+        moment = parse_datetime(value)
+        day = parse_date(value) if moment is None else None
+    except ValueError:
+        return None
+    if day:
+        moment = datetime.combine(day, time.min)
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _history_response(history, request):
+    try:
+        limit = min(max(int(request.query_params.get("limit", HISTORY_PAGE_SIZE)), 1), HISTORY_PAGE_SIZE)
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Newest first; older pages are read by passing the oldest predicted_at seen as `before`
+    for param, lookup in (("since", "predicted_at__gte"), ("before", "predicted_at__lt")):
+        value = request.query_params.get(param)
+        if value:
+            moment = _parse_moment(value)
+            if moment is None:
+                return Response({"error": f"{param} must be a date or datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            history = history.filter(**{lookup: moment})
+
+    rows = list(
+        history.order_by('-predicted_at', '-id').values(
+            'student_id', 'class_number', 'predicted_at', 'model_version', 'final_grade', 'feature_hash'
+        )[:limit]
+    )
+    return Response({"count": len(rows), "history": rows}, status=status.HTTP_200_OK)
+
+
+# Student Prediction History (GET API)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def student_prediction_history(request):
+    """
+    Stored predictions of one student, newest first.
+    Query params: student_id, optional since / before (date or datetime) and limit.
+    """
+    student_id = request.query_params.get("student_id")
+    if not student_id:
+        return Response({"error": "student_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    return _history_response(PredictionHistory.objects.filter(student_id=student_id), request)
+
+
+# Class Prediction History (GET API)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def class_prediction_history(request):
+    """
+    Stored predictions of every student in a class, newest first.
+    Query params: school_id, class_number, optional since / before (date or datetime) and limit.
+    """
+    school_id = request.query_params.get("school_id")
+    class_number = request.query_params.get("class_number")
+    if not school_id or not class_number:
+        return Response(
+            {"error": "Both 'school_id' and 'class_number' query parameters are required."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return _history_response(
+        PredictionHistory.objects.filter(school_id=school_id, class_number=class_number),
+        request
+    )
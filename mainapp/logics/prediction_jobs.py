@@ -0,0 +1,284 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from ..models import PredictionJob, PredictionJobResult, Student
+from .model_registry import FEATURE_FIELDS, FEATURES, score_partition
+from .predict import save_final_grades
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from collections import deque
+from concurrent.futures import BrokenExecutor
+import datetime
+import numpy as np
+
+RESULTS_PAGE_SIZE = 500
+# A running job is handed to another worker after this long without saving a partition
+JOB_LEASE = datetime.timedelta(minutes=5)
+MAX_JOB_ATTEMPTS = 3
+
+
+def claim_prediction_job():
+    """
+    Locks the oldest pending job, or a running one whose worker let its lease
+    expire, marks it running under a fresh lease and returns it (or None).
+    A reclaimed job starts over; one that has already had MAX_JOB_ATTEMPTS is failed.
+    """
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                PredictionJob.objects.select_for_update(skip_locked=True)
+                .filter(Q(status=PredictionJob.PENDING) | Q(status=PredictionJob.RUNNING, lease_expires_at__lt=now))
+                .order_by('created_at')
+                .first()
+            )
+            if job is None:
+                return None
+
+            if job.status == PredictionJob.RUNNING:
+                if job.attempts >= MAX_JOB_ATTEMPTS:
+                    job.status = PredictionJob.FAILED
+                    job.error = f"Abandoned by its worker {job.attempts} times."
+                    _finish_job(job)
+                    continue
+                job.results.all().delete()
+                job.processed = job.matched_count = 0
+
+            job.status = PredictionJob.RUNNING
+            job.attempts += 1
+            job.started_at = now
+            job.lease_expires_at = now + JOB_LEASE
+            job.save(update_fields=['status', 'attempts', 'started_at', 'lease_expires_at', 'processed', 'matched_count'])
+        return job
+
+
+def _job_partitions(job, partition_size):
+    """
+    Yields (student_ids, features) partitions of at most partition_size rows,
+    streaming from the database or the uploaded file.
+    """
+    if job.kind == PredictionJob.FILE:
+        import pandas as pd
+        with job.upload.open('rb') as upload:
+            for chunk in pd.read_csv(upload, chunksize=partition_size, encoding='utf-8'):
+                chunk = chunk.rename(columns=FEATURE_FIELDS)
+                yield chunk['student_id'].astype(str).tolist(), chunk[FEATURES].to_numpy(dtype=float)
+        return
+
+    rows = Student.objects.filter(school_id=job.school_id)
+    if job.kind == PredictionJob.CLASS:
+        rows = rows.filter(class_assigned=job.class_number)
+    rows = rows.order_by('pk').values_list('student_id', *FEATURE_FIELDS).iterator(chunk_size=partition_size)
+
+    partition = []
+    for row in rows:
+        partition.append(row)
+        if len(partition) == partition_size:
+            yield [row[0] for row in partition], np.array([row[1:] for row in partition], dtype=float)
+            partition = []
+    if partition:
+        yield [row[0] for row in partition], np.array([row[1:] for row in partition], dtype=float)
+
+
+class JobLeaseLost(Exception):
+    """
+    The job was reclaimed by another worker after this one's lease expired.
+    """
+
+
+def _owned(job):
+    # Each claim bumps attempts, so it identifies the claim a worker is running under
+    return PredictionJob.objects.filter(pk=job.pk, status=PredictionJob.RUNNING, attempts=job.attempts)
+
+
+def _save_partition(job, student_ids, features, scored):
+    model_version, grades = scored
+    grades_by_student_id = dict(zip(student_ids, grades))
+    with transaction.atomic():
+        # Renewing the lease checks the claim and locks the job row, so the job
+        # cannot be reclaimed while this partition is being written
+        job.lease_expires_at = timezone.now() + JOB_LEASE
+        if not _owned(job).update(lease_expires_at=job.lease_expires_at):
+            raise JobLeaseLost(f"Job {job.id} was reclaimed by another worker.")
+
+        matched, unmatched = save_final_grades(
+            job.school_id, grades_by_student_id, dict(zip(student_ids, features)), model_version
+        )
+        unmatched = set(unmatched)
+        PredictionJobResult.objects.bulk_create([
+            PredictionJobResult(job=job, student_id=student_id, final_grade=grade, matched=student_id not in unmatched)
+            for student_id, grade in grades_by_student_id.items()
+        ])
+        job.processed += len(student_ids)
+        job.matched_count += len(matched)
+        job.save(update_fields=['processed', 'matched_count'])
+
+
+def run_prediction_job(job, executor, partition_size, max_in_flight):
+    """
+    Scores a claimed job partition by partition on the process pool and saves
+    each partition's grades and results as it completes. At most max_in_flight
+    partitions are queued on the pool, so memory stays bounded for any job size.
+    A broken pool fails the job and is re-raised so the caller can replace it.
+    A job reclaimed by another worker is dropped without writing anything more.
+    """
+    try:
+        if job.kind != PredictionJob.FILE:
+            rows = Student.objects.filter(school_id=job.school_id)
+            if job.kind == PredictionJob.CLASS:
+                rows = rows.filter(class_assigned=job.class_number)
+            job.total = rows.count()
+            if not _owned(job).update(total=job.total):
+                raise JobLeaseLost(f"Job {job.id} was reclaimed by another worker.")
+
+        in_flight = deque()
+        for student_ids, features in _job_partitions(job, partition_size):
+            in_flight.append((student_ids, features, executor.submit(score_partition, features)))
+            if len(in_flight) >= max_in_flight:
+                student_ids, features, future = in_flight.popleft()
+                _save_partition(job, student_ids, features, future.result())
+        while in_flight:
+            student_ids, features, future = in_flight.popleft()
+            _save_partition(job, student_ids, features, future.result())
+
+        job.status = PredictionJob.DONE
+        job.total = job.processed
+    except JobLeaseLost as e:
+        job.error = str(e)
+        return job
+    except Exception as e:
+        job.status = PredictionJob.FAILED
+        job.error = str(e)
+        if isinstance(e, BrokenExecutor):
+            _finish_job(job)
+            raise
+    _finish_job(job)
+    return job
+
+
+def _finish_job(job):
+    """
+    Records the job's outcome unless another worker has reclaimed it since.
+    Returns whether it was recorded.
+    """
+    job.finished_at = timezone.now()
+    job.lease_expires_at = None
+    upload = job.upload.name if job.upload else ''
+    finished = _owned(job).update(
+        status=job.status,
+        total=job.total,
+        error=job.error,
+        upload='',
+        finished_at=job.finished_at,
+        lease_expires_at=None
+    )
+    if finished and upload:
+        # The upload is only needed until the job stops running
+        job.upload.storage.delete(upload)
+        job.upload = None
+    return bool(finished)
+
+
+def _job_details(job):
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "school_id": job.school_id,
+        "class_number": job.class_number,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "matched": job.matched_count,
+        "progress": round(job.processed * 100 / job.total, 2) if job.total else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# Submit Prediction Job (POST API)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def submit_prediction_job(request):
+    """
+    Queues a bulk prediction for the process_prediction_jobs worker.
+    Query params: school_id and optional class_number. With an uploaded
+    'file' the CSV is scored; otherwise the class (or whole school) is.
+    """
+    school_id = request.query_params.get("school_id")
+    class_number = request.query_params.get("class_number", "")
+    if not school_id:
+        return Response({"error": "school_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    upload = request.FILES.get('file')
+    if upload:
+        kind = PredictionJob.FILE
+    elif class_number:
+        kind = PredictionJob.CLASS
+    else:
+        kind = PredictionJob.SCHOOL
+
+    job = PredictionJob.objects.create(
+        kind=kind,
+        school_id=school_id,
+        class_number=class_number,
+        upload=upload,
+        requested_by=request.user
+    )
+    return Response(_job_details(job), status=status.HTTP_202_ACCEPTED)
+
+
+# Prediction Job Status (GET API)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def prediction_job_status(request):
+    job_id = request.query_params.get("job_id")
+    if not job_id:
+        return Response({"error": "job_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    job = PredictionJob.objects.filter(id=job_id).first()
+    if not job:
+        return Response({"error": "Prediction job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(_job_details(job), status=status.HTTP_200_OK)
+
+
+# Prediction Job Results (GET API)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def prediction_job_results(request):
+    """
+    Predicted grades of a finished job, a page at a time.
+    Query params: job_id, optional offset (default 0) and limit (default RESULTS_PAGE_SIZE).
+    """
+    job_id = request.query_params.get("job_id")
+    if not job_id:
+        return Response({"error": "job_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        offset = max(int(request.query_params.get("offset", 0)), 0)
+        limit = min(max(int(request.query_params.get("limit", RESULTS_PAGE_SIZE)), 1), RESULTS_PAGE_SIZE)
+    except ValueError:
+        return Response({"error": "offset and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+    job = PredictionJob.objects.filter(id=job_id).first()
+    if not job:
+        return Response({"error": "Prediction job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    if job.status != PredictionJob.DONE:
+        return Response({"error": f"Prediction job is {job.status}.", "status": job.status}, status=status.HTTP_409_CONFLICT)
+
+    results = list(
+        job.results.order_by('id').values('student_id', 'final_grade', 'matched')[offset:offset + limit]
+    )
+    return Response({
+        "job_id": job.id,
+        "total": job.total,
+        "offset": offset,
+        "limit": limit,
+        "results": results,
+    }, status=status.HTTP_200_OK)
@@ -5,7 +5,7 @@ from rest_framework import status
 from ..serializers import TeacherSerializer
 from ..models import Teacher
 from django.contrib.auth import get_user_model
-from ..logics.email import send_email_sync
+from ..logics.email import queue_email
 User = get_user_model()
 import os, datetime
 
@@ -62,7 +62,7 @@ def add_principal(request):
             'current_year': datetime.datetime.now().year
         }
 
-        send_email_sync(
+        queue_email(
             subject=email_subject,
             template_name='emails/welcome_email.html', 
             context=email_context, 
@@ -147,7 +147,7 @@ def delete_principal(request, pk):
         'current_year': datetime.datetime.now().year
     }
 
-    send_email_sync(
+    queue_email(
         subject=email_subject,
         template_name='emails/delete_teacher.html', 
         context=email_context, 
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import cache
+from ..models import Student
+from array import array
+import random
+
+
+def _pks_cache_key(school_id):
+    return f"student_sample_pks:{school_id}"
+
+
+def forget_school_sample(school_id):
+    """
+    Drops the cached student ids of a school, so the next sample sees added, moved or removed students.
+    """
+    cache.delete(_pks_cache_key(school_id))
+
+
+def _school_student_pks(school_id):
+    """
+    The school's student pks, cached as one packed block of 8-byte integers
+    so reading them back is a copy rather than unpickling a list.
+    """
+    key = _pks_cache_key(school_id)
+    packed = cache.get(key)
+    if packed is None:
+        packed = array('q', Student.objects.filter(school_id=school_id).values_list('pk', flat=True)).tobytes()
+        cache.set(key, packed, settings.STUDENT_SAMPLE_CACHE_SECONDS)
+    pks = array('q')
+    pks.frombytes(packed)
+    return pks
+
+
+def sample_students(school_id, k=1):
+    """
+    Up to k distinct random students of a school, drawn uniformly from its
+    cached ids and fetched in one query, instead of sorting the school by
+    random().
+    """
+    pks = _school_student_pks(school_id)
+    picked = random.sample(pks, min(k, len(pks)))
+    students = list(Student.objects.filter(school_id=school_id, pk__in=picked))
+
+    # Some cached ids were deleted or moved since the list was cached: refresh it and draw again
+    if len(students) < len(picked):
+        forget_school_sample(school_id)
+        pks = _school_student_pks(school_id)
+        picked = random.sample(pks, min(k, len(pks)))
+        students = list(Student.objects.filter(school_id=school_id, pk__in=picked))
+
+    random.shuffle(students)
+    return students
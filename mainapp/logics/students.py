@@ -2,8 +2,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from ..models import Student, Teacher, Attendance, Class
+from ..models import Student, Teacher, Attendance, AttendanceMark, AttendanceTally, Class
 from ..serializers import StudentSerializer
+from .prediction_cache import prediction_cache
+from .sampling import forget_school_sample
 from django.shortcuts import get_object_or_404
 from datetime import date
 import csv
@@ -116,10 +118,16 @@ def view_student(request, pk):
 @permission_classes([IsAuthenticated])
 def update_student(request, pk):
     student = get_object_or_404(Student, pk=pk)
+    previous_student_id = student.student_id
+    previous_school_id = student.school_id
     serializer = StudentSerializer(student, data=request.data)
     print(request.data)
     if serializer.is_valid():
         serializer.save()
+        prediction_cache.forget({previous_student_id, student.student_id})
+        if student.school_id != previous_school_id:
+            forget_school_sample(previous_school_id)
+            forget_school_sample(student.school_id)
         return Response({"message": "Student updated successfully."}, status=status.HTTP_200_OK)
     return Response({
         "message": "Failed to update student.",
@@ -132,12 +140,9 @@ def update_student(request, pk):
 @permission_classes([IsAuthenticated])
 def delete_student(request, pk):
     student = get_object_or_404(Student, pk=pk)
-    attendances = Attendance.objects.filter(
-        students__contains=[{'student_id': student.student_id}]
-    )
-    for attendance in attendances:
-        attendance.students = [s for s in attendance.students if s.get('student_id') != student.student_id]
-        attendance.save()
+    AttendanceMark.objects.filter(student_id=student.student_id).delete()
+    AttendanceTally.objects.filter(student_id=student.student_id).delete()
+    prediction_cache.forget([student.student_id])
     student.delete()
     return Response({"message": "Student deleted successfully."}, status=status.HTTP_200_OK)
 
@@ -275,6 +280,7 @@ def import_students(request):
 
                     if serializer.is_valid():
                         student = serializer.save()
+                        prediction_cache.forget([student.student_id])
                         results[action].append(student_data['student_id'])
                         results['success'] += 1
 
@@ -0,0 +1,91 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from mainapp.logics.model_registry import build_backend
+from mainapp.models import ModelRelease
+
+
+class Command(BaseCommand):
+    help = ("Deploys a grade model artifact (.joblib or exported .npz) to running workers, "
+            "as the active model or as a shadow scored on a sample of requests.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="Model artifact to deploy")
+        parser.add_argument('--shadow', action='store_true',
+                            help="Deploy as a shadow model instead of replacing the active one")
+        parser.add_argument('--sample-rate', type=float, default=0.1,
+                            help="Share of prediction batches the shadow model also scores")
+        parser.add_argument('--promote', action='store_true', help="Make the current shadow model active")
+        parser.add_argument('--stop-shadow', action='store_true', help="Stop shadow scoring")
+        parser.add_argument('--rollback', action='store_true',
+                            help="Return to the previously active model (or the one configured in settings)")
+
+    def handle(self, *args, **options):
+        actions = [options['promote'], options['stop_shadow'], options['rollback'], bool(options['path'])]
+        if sum(actions) != 1:
+            raise CommandError("Pass a model path, or exactly one of --promote, --stop-shadow or --rollback.")
+
+        with transaction.atomic():
+            if options['promote']:
+                message = self.promote()
+            elif options['stop_shadow']:
+                updated = ModelRelease.objects.filter(role=ModelRelease.SHADOW).update(role=ModelRelease.RETIRED)
+                message = "Shadow scoring stopped." if updated else "No shadow model was running."
+            elif options['rollback']:
+                message = self.rollback()
+            else:
+                message = self.deploy(options['path'], options['shadow'], options['sample_rate'])
+
+        self.stdout.write(self.style.SUCCESS(f"{message} Workers switch within SPPML_RELEASE_CHECK_SECONDS."))
+
+    def deploy(self, path, shadow, sample_rate):
+        path = os.path.abspath(path)
+        if shadow and not 0 < sample_rate <= 1:
+            raise CommandError("--sample-rate must be in (0, 1].")
+
+        # Loaded and warmed here first, so a broken artifact never reaches the workers
+        try:
+            version = build_backend(path).version
+        except Exception as e:
+            raise CommandError(f"Could not load {path}: {e}")
+
+        role = ModelRelease.SHADOW if shadow else ModelRelease.ACTIVE
+        ModelRelease.objects.select_for_update().filter(role=role).update(role=ModelRelease.RETIRED)
+        ModelRelease.objects.create(
+            path=path,
+            version=version,
+            role=role,
+            shadow_sample_rate=sample_rate if shadow else 0.0,
+            activated_at=None if shadow else timezone.now()
+        )
+        return f"Deployed {version} as the {role} model."
+
+    def promote(self):
+        shadow = ModelRelease.objects.select_for_update().filter(role=ModelRelease.SHADOW).first()
+        if not shadow:
+            raise CommandError("There is no shadow model to promote.")
+        ModelRelease.objects.filter(role=ModelRelease.ACTIVE).update(role=ModelRelease.RETIRED)
+        shadow.role = ModelRelease.ACTIVE
+        shadow.activated_at = timezone.now()
+        shadow.save(update_fields=['role', 'activated_at'])
+        return f"Promoted {shadow.version} to the active model."
+
+    def rollback(self):
+        active = ModelRelease.objects.select_for_update().filter(role=ModelRelease.ACTIVE).first()
+        if not active:
+            raise CommandError("No deployed model is active; workers already use the one configured in settings.")
+        active.role = ModelRelease.RETIRED
+        active.save(update_fields=['role'])
+
+        previous = (
+            ModelRelease.objects.filter(role=ModelRelease.RETIRED, activated_at__lt=active.activated_at)
+            .order_by('-activated_at')
+            .first()
+        )
+        if not previous:
+            return f"Retired {active.version}; workers return to the model configured in settings."
+        # activated_at is kept, so a further rollback keeps walking back rather than undoing this one
+        previous.role = ModelRelease.ACTIVE
+        previous.save(update_fields=['role'])
+        return f"Rolled back from {active.version} to {previous.version}."
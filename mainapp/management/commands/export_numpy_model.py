@@ -0,0 +1,56 @@
+import os
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from mainapp.logics.model_registry import FEATURE_FIELDS, FEATURES, artifact_version
+from mainapp.logics.numpy_engine import NumpyModel, export_params, save_params
+from mainapp.models import Student
+
+
+class Command(BaseCommand):
+    help = "Exports the scikit-learn grade model's parameters for the NumPy inference engine and checks they agree."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default=settings.SPPML_MODEL_PATH,
+                            help="joblib artifact to export (default: SPPML_MODEL_PATH)")
+        parser.add_argument('--output', default=settings.SPPML_NUMPY_MODEL_PATH,
+                            help="Where to write the .npz parameters (default: SPPML_NUMPY_MODEL_PATH)")
+        parser.add_argument('--tolerance', type=float, default=1e-6,
+                            help="Largest allowed difference from scikit-learn's predictions")
+        parser.add_argument('--samples', type=int, default=1000,
+                            help="Rows compared: stored students plus random rows to make up the number")
+
+    def handle(self, *args, **options):
+        import joblib
+        import pandas as pd
+
+        model_path, output = options['model'], options['output']
+        if not model_path:
+            raise CommandError("No model to export: pass --model or set SPPML_MODEL_PATH.")
+        if not output:
+            raise CommandError("No output path: pass --output or set SPPML_NUMPY_MODEL_PATH.")
+
+        model = joblib.load(model_path)
+        try:
+            params = export_params(model)
+        except ValueError as e:
+            raise CommandError(f"{e} Keep serving this model with scikit-learn.")
+
+        # Written next to the target and moved into place only once it agrees with scikit-learn
+        staging = f"{output}.tmp"
+        save_params(staging, params, artifact_version(model_path))
+
+        samples = np.array(
+            Student.objects.values_list(*FEATURE_FIELDS)[:options['samples']], dtype=float
+        ).reshape(-1, len(FEATURES))
+        random_rows = np.random.default_rng().uniform(0, 100, (max(options['samples'] - len(samples), 1), len(FEATURES)))
+        samples = np.vstack([samples, random_rows])
+
+        expected = model.predict(pd.DataFrame(samples, columns=FEATURES))
+        difference = float(np.max(np.abs(NumpyModel(staging).predict(samples) - expected)))
+        if difference > options['tolerance']:
+            os.remove(staging)
+            raise CommandError(f"NumPy predictions differ from scikit-learn by up to {difference:g}; nothing exported.")
+
+        os.replace(staging, output)
+        self.stdout.write(f"Exported {params['kind']} model to {output} ({len(samples)} rows checked, max difference {difference:g})")
@@ -0,0 +1,43 @@
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from mainapp.logics.email import FROM_EMAIL
+from mainapp.logics.mail_pool import MailConnectionPool
+import time
+
+
+class Command(BaseCommand):
+    help = "Sends dummy emails through the mail connection pool and reports throughput per connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--connections', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=50, help="Messages handed to the pool per send")
+        parser.add_argument('--backend', default='django.core.mail.backends.locmem.EmailBackend',
+                            help="Email backend to measure against, e.g. the locmem or filebased backend")
+
+    def handle(self, *args, **options):
+        pool = MailConnectionPool(options['connections'], backend=options['backend'])
+        started = time.monotonic()
+        try:
+            for offset in range(0, options['messages'], options['batch_size']):
+                count = min(options['batch_size'], options['messages'] - offset)
+                messages = {}
+                for index in range(offset, offset + count):
+                    message = EmailMultiAlternatives(
+                        "Throughput test", "Plain text body", FROM_EMAIL, [f"test{index}@example.com"]
+                    )
+                    message.attach_alternative("<p>HTML body</p>", "text/html")
+                    messages[index] = message
+                pool.send(messages)
+        finally:
+            pool.close()
+        elapsed = time.monotonic() - started
+
+        for stat in pool.stats():
+            self.stdout.write(
+                f"Connection {stat['connection']}: {stat['messages']} messages in {stat['batches']} batches, "
+                f"{stat['connects']} connects, {stat['messages_per_second']} msg/s"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {options['messages']} messages in {elapsed:.3f}s ({options['messages'] / elapsed:.1f} msg/s overall)"
+        ))
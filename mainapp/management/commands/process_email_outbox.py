@@ -0,0 +1,33 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mainapp.logics.email import process_outbox_batch
+from mainapp.logics.mail_pool import MailConnectionPool
+
+
+class Command(BaseCommand):
+    help = "Sends queued emails from the outbox, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--concurrency', type=int, default=settings.EMAIL_OUTBOX_CONCURRENCY,
+                            help="Number of mail connections kept open and sending at the same time")
+        parser.add_argument('--max-attempts', type=int, default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+                            help="Attempts before an email is dead-lettered")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait when the outbox is empty")
+        parser.add_argument('--once', action='store_true', help="Drain the outbox once and exit")
+
+    def handle(self, *args, **options):
+        pool = MailConnectionPool(options['concurrency'])
+        try:
+            while True:
+                sent, failed, dead = process_outbox_batch(options['batch_size'], pool, options['max_attempts'])
+                if sent or failed or dead:
+                    self.stdout.write(f"Sent {sent}, retrying {failed}, dead-lettered {dead}")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        finally:
+            pool.close()
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mainapp.models import PredictionJob
+from mainapp.logics.model_registry import init_scoring_process, registry
+from mainapp.logics.model_rollout import release_watcher
+from mainapp.logics.prediction_jobs import claim_prediction_job, run_prediction_job
+
+
+class Command(BaseCommand):
+    help = "Runs queued prediction jobs, scoring them in partitions on a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.PREDICTION_JOB_WORKERS,
+                            help="Scoring processes (default: one per CPU)")
+        parser.add_argument('--partition-size', type=int, default=settings.PREDICTION_JOB_PARTITION_SIZE,
+                            help="Rows scored per task")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait when no job is pending")
+        parser.add_argument('--once', action='store_true', help="Run the pending jobs once and exit")
+
+    def start_pool(self, workers):
+        # Spawned rather than forked, so pool workers never inherit this process's database connections.
+        # They load the model this process is using
+        self.pool_model = (registry.path, registry.version)
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_scoring_process,
+            initargs=(registry.path,)
+        )
+
+    def handle(self, *args, **options):
+        executor = self.start_pool(options['workers'])
+        max_in_flight = (options['workers'] or os.cpu_count()) * 2
+        try:
+            while True:
+                # A newly deployed model is picked up between jobs by replacing the pool
+                release_watcher.check(background=False)
+                if (registry.path, registry.version) != self.pool_model:
+                    executor.shutdown()
+                    executor = self.start_pool(options['workers'])
+                    self.stdout.write(f"Switched to model {registry.version}")
+
+                job = claim_prediction_job()
+                if job:
+                    try:
+                        job = run_prediction_job(job, executor, options['partition_size'], max_in_flight)
+                    except BrokenExecutor:
+                        self.stderr.write(f"Job {job.id} failed: {job.error}. Restarting the process pool.")
+                        executor.shutdown(cancel_futures=True)
+                        executor = self.start_pool(options['workers'])
+                        continue
+                    if job.status == PredictionJob.RUNNING:
+                        self.stderr.write(f"Job {job.id} dropped: {job.error}")
+                    else:
+                        self.stdout.write(f"Job {job.id} {job.status}: {job.processed} scored, {job.matched_count} saved")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        finally:
+            executor.shutdown()
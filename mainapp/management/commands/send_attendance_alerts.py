@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from mainapp.logics.attendance_alerts import send_low_attendance_alerts
+
+
+class Command(BaseCommand):
+    help = "Emails every student whose attendance is below their class threshold."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--school-id', help="Only alert students of this school")
+        parser.add_argument('--class-number', help="Only alert students of this class")
+        parser.add_argument('--cooldown-hours', type=int, help="Skip students alerted within this many hours")
+
+    def handle(self, *args, **options):
+        alerted = send_low_attendance_alerts(
+            school_id=options['school_id'],
+            class_number=options['class_number'],
+            cooldown_hours=options['cooldown_hours']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Queued low attendance alerts for {len(alerted)} students"))
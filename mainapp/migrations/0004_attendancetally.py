@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:03
+
+from django.db import migrations, models
+
+
+def seed_attendance_tallies(apps, schema_editor):
+    Attendance = apps.get_model('mainapp', 'Attendance')
+    AttendanceTally = apps.get_model('mainapp', 'AttendanceTally')
+
+    present_counts = {}
+    for record in Attendance.objects.values('school_id', 'class_number', 'students').iterator():
+        for student in record['students']:
+            if student.get('status') == 'present':
+                key = (record['school_id'], record['class_number'], student['student_id'])
+                present_counts[key] = present_counts.get(key, 0) + 1
+
+    AttendanceTally.objects.bulk_create(
+        [
+            AttendanceTally(school_id=school_id, class_number=class_number, student_id=student_id, present_count=count)
+            for (school_id, class_number, student_id), count in present_counts.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0004_teacher_mfa_enabled_emailotp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('school_id', models.CharField(max_length=100)),
+                ('class_number', models.CharField(max_length=20)),
+                ('student_id', models.CharField(max_length=50)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('school_id', 'class_number', 'student_id')},
+            },
+        ),
+        migrations.RunPython(seed_attendance_tallies, migrations.RunPython.noop),
+    ]
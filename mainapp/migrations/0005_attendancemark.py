@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0004_attendancetally'),
+    ]
+
+    operations = [
+        # The JSON column keeps its name in the database; only the model field is renamed
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='attendance',
+                    old_name='students',
+                    new_name='legacy_students',
+                ),
+                migrations.AlterField(
+                    model_name='attendance',
+                    name='legacy_students',
+                    field=models.JSONField(blank=True, db_column='students', default=list),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AttendanceMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('school_id', models.CharField(max_length=100)),
+                ('class_number', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('student_id', models.CharField(max_length=50)),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Not Marked'), (1, 'Present'), (2, 'Absent')], default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student_id', 'date'], name='mainapp_att_student_3c5608_idx')],
+                'unique_together': {('school_id', 'class_number', 'date', 'student_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 500
+
+STATUS_CODES = {'not_marked': 0, 'present': 1, 'absent': 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+
+def backfill_attendance_marks(apps, schema_editor):
+    """
+    Copies each day's JSON roster into AttendanceMark rows, one chunk of days
+    per transaction, and empties the JSON once copied. Rows that still hold
+    JSON are the ones left to do, so the backfill can be re-run safely.
+    """
+    Attendance = apps.get_model('mainapp', 'Attendance')
+    AttendanceMark = apps.get_model('mainapp', 'AttendanceMark')
+
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Attendance.objects.select_for_update()
+                .filter(pk__gt=last_pk)
+                .exclude(legacy_students=[])
+                .order_by('pk')
+                .values('pk', 'school_id', 'class_number', 'date', 'legacy_students')[:CHUNK_SIZE]
+            )
+            if not rows:
+                break
+
+            marks = [
+                AttendanceMark(
+                    school_id=row['school_id'],
+                    class_number=row['class_number'],
+                    date=row['date'],
+                    student_id=student['student_id'],
+                    status=STATUS_CODES.get(student.get('status'), 0)
+                )
+                for row in rows
+                for student in row['legacy_students']
+                if student.get('student_id')
+            ]
+            AttendanceMark.objects.bulk_create(marks, ignore_conflicts=True)
+            Attendance.objects.filter(pk__in=[row['pk'] for row in rows]).update(legacy_students=[])
+            last_pk = rows[-1]['pk']
+
+
+def restore_legacy_students(apps, schema_editor):
+    Attendance = apps.get_model('mainapp', 'Attendance')
+    AttendanceMark = apps.get_model('mainapp', 'AttendanceMark')
+    Student = apps.get_model('mainapp', 'Student')
+
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            days = list(Attendance.objects.filter(pk__gt=last_pk).order_by('pk')[:CHUNK_SIZE])
+            if not days:
+                break
+
+            for day in days:
+                marks = AttendanceMark.objects.filter(
+                    school_id=day.school_id,
+                    class_number=day.class_number,
+                    date=day.date
+                ).order_by('id').values_list('student_id', 'status')
+                details = {
+                    row['student_id']: row
+                    for row in Student.objects.filter(
+                        student_id__in=[sid for sid, _ in marks]
+                    ).values('student_id', 'full_name', 'email', 'phone')
+                }
+                day.legacy_students = [
+                    {
+                        "student_id": sid,
+                        "name": details.get(sid, {}).get('full_name', ''),
+                        "email": details.get(sid, {}).get('email', ''),
+                        "phone": details.get(sid, {}).get('phone', ''),
+                        "status": STATUS_NAMES[status],
+                        "present_count": 0,
+                        "percentage": 0.0
+                    }
+                    for sid, status in marks
+                ]
+            Attendance.objects.bulk_update(days, ['legacy_students'])
+            last_pk = days[-1].pk
+
+
+class Migration(migrations.Migration):
+    # Each chunk commits on its own so the attendance table is never locked as a whole
+    atomic = False
+
+    dependencies = [
+        ('mainapp', '0005_attendancemark'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_attendance_marks, restore_legacy_students),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:06
+
+import datetime
+from django.db import migrations, models
+
+
+def recount_working_days(apps, schema_editor):
+    Class = apps.get_model('mainapp', 'Class')
+    ClassWorkingDay = apps.get_model('mainapp', 'ClassWorkingDay')
+
+    today = datetime.date.today()
+    working_days = {
+        (row.school_id, row.class_number): row.working_days
+        for row in ClassWorkingDay.objects.all()
+    }
+    classes = list(Class.objects.all())
+    for class_obj in classes:
+        total = 0
+        for date_str, is_working in working_days.get((class_obj.school_id, class_obj.class_number), {}).items():
+            try:
+                day = datetime.date.fromisoformat(date_str)
+            except ValueError:
+                continue
+            if class_obj.start_date <= day <= today and is_working is True:
+                total += 1
+        class_obj.total_working_days = total
+        class_obj.working_days_refreshed_on = today
+    Class.objects.bulk_update(classes, ['total_working_days', 'working_days_refreshed_on'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0006_backfill_attendance_marks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='working_days_refreshed_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(recount_working_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:07
+
+import datetime
+from django.db import migrations, models
+
+
+def pack_working_days(apps, schema_editor):
+    ClassWorkingDay = apps.get_model('mainapp', 'ClassWorkingDay')
+
+    rows = list(ClassWorkingDay.objects.all())
+    for row in rows:
+        days = []
+        for date_str, is_working in row.working_days.items():
+            try:
+                day = datetime.date.fromisoformat(date_str)
+            except ValueError:
+                continue
+            if is_working is True:
+                days.append(day)
+
+        bits = 0
+        row.term_start = min(days) if days else None
+        for day in days:
+            bits |= 1 << (day - row.term_start).days
+        row.calendar = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        row.working_count = bits.bit_count()
+    ClassWorkingDay.objects.bulk_update(rows, ['term_start', 'calendar', 'working_count'], batch_size=500)
+
+
+def unpack_working_days(apps, schema_editor):
+    ClassWorkingDay = apps.get_model('mainapp', 'ClassWorkingDay')
+
+    rows = list(ClassWorkingDay.objects.all())
+    for row in rows:
+        bits = int.from_bytes(bytes(row.calendar), 'little')
+        row.working_days = {
+            (row.term_start + datetime.timedelta(days=offset)).isoformat(): True
+            for offset in range(bits.bit_length()) if bits >> offset & 1
+        }
+    ClassWorkingDay.objects.bulk_update(rows, ['working_days'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0007_class_working_days_refreshed_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classworkingday',
+            name='calendar',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='classworkingday',
+            name='term_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='classworkingday',
+            name='working_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(pack_working_days, unpack_working_days),
+        migrations.RemoveField(
+            model_name='classworkingday',
+            name='working_days',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0008_classworkingday_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(max_length=50)),
+                ('school_id', models.CharField(max_length=100)),
+                ('class_number', models.CharField(max_length=20)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('percentage', models.FloatField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student_id', 'sent_at'], name='mainapp_att_student_afc1d5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0011_predictionjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['school_id', 'class_assigned'], name='mainapp_stu_school__e96391_idx'),
+        ),
+    ]
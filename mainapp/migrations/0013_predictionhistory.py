@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0012_student_school_class_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(max_length=50)),
+                ('school_id', models.CharField(max_length=100)),
+                ('class_number', models.CharField(max_length=20)),
+                ('predicted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('model_version', models.CharField(max_length=40)),
+                ('final_grade', models.FloatField()),
+                ('feature_hash', models.CharField(max_length=16)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student_id', 'predicted_at'], name='mainapp_pre_student_4697cd_idx'), models.Index(fields=['school_id', 'class_number', 'predicted_at'], name='mainapp_pre_school__3c6584_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0013_predictionhistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelRelease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500)),
+                ('version', models.CharField(max_length=40)),
+                ('role', models.CharField(choices=[('active', 'Active'), ('shadow', 'Shadow'), ('retired', 'Retired')], default='retired', max_length=10)),
+                ('shadow_sample_rate', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['role'], name='mainapp_mod_role_be2f8f_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShadowComparison',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('primary_version', models.CharField(max_length=40)),
+                ('rows', models.PositiveIntegerField()),
+                ('primary_ms', models.FloatField()),
+                ('shadow_ms', models.FloatField()),
+                ('mean_abs_diff', models.FloatField()),
+                ('max_abs_diff', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('release', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shadow_comparisons', to='mainapp.modelrelease')),
+            ],
+        ),
+    ]
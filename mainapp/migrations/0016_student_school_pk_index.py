@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0015_predictionjob_lease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['school_id', 'id'], name='mainapp_stu_school__070a10_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 15:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0016_student_school_pk_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='class',
+            name='working_days_refreshed_on',
+        ),
+    ]
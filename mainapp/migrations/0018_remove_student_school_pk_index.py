@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 15:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0017_remove_class_working_days_refreshed_on'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='student',
+            name='mainapp_stu_school__070a10_idx',
+        ),
+    ]
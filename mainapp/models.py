@@ -1,6 +1,7 @@
 from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from datetime import date
+from django.utils import timezone
+from datetime import date, timedelta
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -110,6 +111,11 @@ class Student(models.Model):
     prev_grade2 = models.FloatField()
     final_grade = models.FloatField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['school_id', 'class_assigned']),
+        ]
+
     def __str__(self):
         return f"{self.full_name} - {self.student_id}"
 
@@ -128,21 +134,32 @@ class Class(models.Model):
             class_number=self.class_number
         ).first()
 
-        total_working_days = 0
-
-        if class_working_day:
-            working_days_dict = class_working_day.working_days
-            for date_str, is_working in working_days_dict.items():
-                try:
-                    day = date.fromisoformat(date_str)
-                except ValueError:
-                    continue
-
-                if self.start_date <= day <= date.today() and is_working is True:
-                    total_working_days += 1
+        total_working_days = class_working_day.count_between(self.start_date, date.today()) if class_working_day else 0
 
         self.total_working_days = total_working_days
-        self.save()
+        self.save(update_fields=['total_working_days'])
+
+    def apply_working_day_change(self, day, was_working, is_working):
+        """
+        Adjusts total_working_days in place when a single day flips, instead of recounting.
+        """
+        self.apply_working_day_changes([(day, was_working, is_working)])
+
+    def apply_working_day_changes(self, changes):
+        """
+        Same as apply_working_day_change for many (day, was_working, is_working) flips, in one UPDATE.
+        """
+        today = date.today()
+        delta = sum(
+            int(is_working) - int(was_working)
+            for day, was_working, is_working in changes
+            if self.start_date <= day <= today
+        )
+        if not delta:
+            return
+
+        Class.objects.filter(pk=self.pk).update(total_working_days=models.F('total_working_days') + delta)
+        self.total_working_days += delta
 
     def __str__(self):
         return f"Class {self.class_number} - {self.total_working_days} Working Days"
@@ -152,11 +169,69 @@ class ClassWorkingDay(models.Model):
     school = models.CharField(max_length=100)
     school_id = models.CharField(max_length=100)
     class_number = models.CharField(max_length=10)
-    working_days = models.JSONField(default=dict)
+    # Bit n of calendar is set when term_start + n days was a working day
+    term_start = models.DateField(null=True, blank=True)
+    calendar = models.BinaryField(default=bytes)
+    working_count = models.PositiveIntegerField(default=0)
 
     @property
     def total_working_days(self):
-        return sum(1 for day in self.working_days.values() if day is True)
+        return self.working_count
+
+    @property
+    def working_days(self):
+        bits = self._bits()
+        return {
+            (self.term_start + timedelta(days=offset)).isoformat(): True
+            for offset in range(bits.bit_length()) if bits >> offset & 1
+        }
+
+    def _bits(self):
+        return int.from_bytes(bytes(self.calendar), 'little')
+
+    def _store(self, bits):
+        self.calendar = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        self.working_count = bits.bit_count()
+
+    def is_working(self, day):
+        if self.term_start is None or day < self.term_start:
+            return False
+        return bool(self._bits() >> (day - self.term_start).days & 1)
+
+    def set_working(self, day, is_working):
+        """
+        Marks a single day as working or not and returns whether it was working before.
+        """
+        was_working = self.is_working(day)
+        if was_working == is_working:
+            return was_working
+
+        bits = self._bits()
+        if self.term_start is None:
+            self.term_start = day
+        elif day < self.term_start:
+            bits <<= (self.term_start - day).days
+            self.term_start = day
+
+        offset = (day - self.term_start).days
+        if is_working:
+            bits |= 1 << offset
+        else:
+            bits &= ~(1 << offset)
+        self._store(bits)
+        return was_working
+
+    def count_between(self, start, end):
+        """
+        Number of working days from start to end, both inclusive.
+        """
+        if self.term_start is None or end < start:
+            return 0
+        low = max((start - self.term_start).days, 0)
+        high = (end - self.term_start).days
+        if high < low:
+            return 0
+        return ((self._bits() >> low) & ((1 << (high - low + 1)) - 1)).bit_count()
 
     class Meta:
         unique_together = ('school_id', 'class_number')
@@ -180,7 +255,10 @@ class Attendance(models.Model):
     class_number = models.CharField(max_length=20)
     date = models.DateField()
 
-    students = models.JSONField(default=list)
+    # Pre-normalisation copy of the day's roster; marks now live in AttendanceMark
+    legacy_students = models.JSONField(default=list, blank=True, db_column='students')
+
+    _students = None
 
     class Meta:
         unique_together = ('school_id', 'class_number', 'date')
@@ -192,58 +270,435 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.school} - Class {self.class_number} - {self.date}"
 
-    def save(self, *args, **kwargs):
-        with transaction.atomic():
-            attendance_records = Attendance.objects.filter(
+    @property
+    def students(self):
+        if self._students is None:
+            self._students = self._load_students() if self.pk else []
+        return self._students
+
+    @students.setter
+    def students(self, value):
+        self._students = list(value)
+
+    def _load_students(self):
+        marks = list(
+            AttendanceMark.objects.filter(
                 school_id=self.school_id,
-                class_number=self.class_number
-            )
+                class_number=self.class_number,
+                date=self.date
+            ).order_by('id').values_list('student_id', 'status')
+        )
+        if not marks:
+            return []
+
+        student_ids = [sid for sid, _ in marks]
+        details = {
+            row['student_id']: row
+            for row in Student.objects.filter(student_id__in=student_ids).values('student_id', 'full_name', 'email', 'phone')
+        }
+        present_counts = dict(
+            AttendanceTally.objects.filter(
+                school_id=self.school_id,
+                class_number=self.class_number,
+                student_id__in=student_ids
+            ).values_list('student_id', 'present_count')
+        )
+        total_days = self._total_working_days()
+
+        students = []
+        for sid, status_code in marks:
+            detail = details.get(sid, {})
+            present_count = present_counts.get(sid, 0)
+            students.append({
+                "student_id": sid,
+                "name": detail.get('full_name', ''),
+                "email": detail.get('email', ''),
+                "phone": detail.get('phone', ''),
+                "status": AttendanceMark.STATUS_NAMES[status_code],
+                "present_count": present_count,
+                "percentage": self.percentage(present_count, total_days)
+            })
+        return students
+
+    def _total_working_days(self):
+        return self.class_working_days(self.school_id, self.class_number)
+
+    @staticmethod
+    def class_working_days(school_id, class_number):
+        """
+        Working days on the class calendar; the denominator of every attendance percentage.
+        """
+        return ClassWorkingDay.objects.filter(
+            school_id=school_id,
+            class_number=class_number
+        ).values_list('working_count', flat=True).first() or 0
+
+    @staticmethod
+    def percentage(present_count, total_days):
+        return (present_count / total_days * 100) if total_days else 0.0
+
+    def save(self, *args, sync_students=True, **kwargs):
+        with transaction.atomic():
+            # The day's roster is stored as marks, so the header row no longer carries it
+            self.legacy_students = []
+            adding = self._state.adding
+            if not adding:
+                # Saves of one sheet run one at a time, so a student added by two of them
+                # at once is inserted by the first and seen as stored by the second
+                Attendance.objects.select_for_update().filter(pk=self.pk).values_list('pk', flat=True).first()
+            super().save(*args, **kwargs)
 
-            present_count_map = {}
-            for record in attendance_records:
-                for s in record.students:
-                    if s['status'] == 'present':
-                        sid = s['student_id']
-                        present_count_map[sid] = present_count_map.get(sid, 0) + 1
+            current_statuses = {}
+            for student in self.students:
+                student.setdefault('status', 'not_marked')
+                current_statuses[student['student_id']] = student['status']
 
-            # Get total working days for percentage calc
-            total_days = sum(
-                1 for entry in ClassWorkingDay.objects.filter(
+            # Marks as currently stored for this day, so only the change is written
+            stored_marks = {} if adding else {
+                mark.student_id: mark
+                for mark in AttendanceMark.objects.select_for_update().filter(
                     school_id=self.school_id,
-                    class_number=self.class_number
-                )
-                for day in entry.working_days.values() if day is True
+                    class_number=self.class_number,
+                    date=self.date
+                ).only('id', 'student_id', 'status')
+            }
+            previous_statuses = {sid: AttendanceMark.STATUS_NAMES[mark.status] for sid, mark in stored_marks.items()}
+
+            to_create, to_update = [], []
+            for sid, status in current_statuses.items():
+                status_code = AttendanceMark.STATUS_CODES[status]
+                mark = stored_marks.get(sid)
+                if mark is None:
+                    to_create.append(AttendanceMark(
+                        school_id=self.school_id,
+                        class_number=self.class_number,
+                        date=self.date,
+                        student_id=sid,
+                        status=status_code
+                    ))
+                elif mark.status != status_code:
+                    mark.status = status_code
+                    to_update.append(mark)
+            removed_ids = stored_marks.keys() - current_statuses.keys()
+
+            if to_create:
+                AttendanceMark.objects.bulk_create(to_create)
+            if to_update:
+                AttendanceMark.objects.bulk_update(to_update, ['status'])
+            if removed_ids:
+                AttendanceMark.objects.filter(pk__in=[stored_marks[sid].pk for sid in removed_ids]).delete()
+
+            deltas = {
+                sid: (current_statuses.get(sid) == 'present') - (previous_statuses.get(sid) == 'present')
+                for sid in previous_statuses.keys() | current_statuses.keys()
+            }
+            present_count_map = AttendanceTally.apply_deltas(
+                self.school_id, self.class_number, deltas, current_statuses.keys()
             )
 
+            # Get total working days for percentage calc
+            total_days = self._total_working_days()
+
             # Process each student
             for student in self.students:
-                student.setdefault('status', 'not_marked')
                 sid = student['student_id']
                 student['present_count'] = present_count_map.get(sid, 0)
-                student['percentage'] = (student['present_count'] / total_days * 100) if total_days else 0.0
+                student['percentage'] = self.percentage(student['present_count'], total_days)
+
+            if sync_students:
+                self._sync_to_student_models(self.students)
+
+    def _sync_to_student_models(self, students_data):
+        percentages = {student['student_id']: student['percentage'] for student in students_data}
+        if not percentages:
+            return
+
+        changed_students = []
+        for student in Student.objects.filter(student_id__in=percentages).only('id', 'student_id', 'attendance_percentage'):
+            percentage = percentages[student.student_id]
+            if student.attendance_percentage != percentage:
+                student.attendance_percentage = percentage
+                changed_students.append(student)
+
+        if changed_students:
+            Student.objects.bulk_update(changed_students, ['attendance_percentage'])
+            # attendance_percentage is a model feature, so cached predictions of these students are stale
+            from .logics.prediction_cache import prediction_cache
+            prediction_cache.forget(student.student_id for student in changed_students)
+
+
+class AttendanceMark(models.Model):
+    """
+    One student's status on one class day.
+    """
+    NOT_MARKED = 0
+    PRESENT = 1
+    ABSENT = 2
 
-                self._sync_to_student_model(student)
+    STATUS_CHOICES = [
+        (NOT_MARKED, 'Not Marked'),
+        (PRESENT, 'Present'),
+        (ABSENT, 'Absent'),
+    ]
+    STATUS_CODES = {'not_marked': NOT_MARKED, 'present': PRESENT, 'absent': ABSENT}
+    STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
 
-            super().save(*args, **kwargs)
+    school_id = models.CharField(max_length=100)
+    class_number = models.CharField(max_length=20)
+    date = models.DateField()
+    student_id = models.CharField(max_length=50)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=NOT_MARKED)
 
-    def _calculate_present_days(self, student_id):
-        present_days = 0
-        records = Attendance.objects.filter(
-            school_id=self.school_id,
-            class_number=self.class_number
-        )
+    class Meta:
+        # The unique index also serves (school_id, class_number, date) lookups
+        unique_together = ('school_id', 'class_number', 'date', 'student_id')
+        indexes = [
+            models.Index(fields=['student_id', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - Class {self.class_number} - {self.date} - {self.STATUS_NAMES[self.status]}"
+
+
+class AttendanceTally(models.Model):
+    """
+    Running count of present days per student, kept in step with Attendance.save()
+    so a day can be saved without rescanning the whole term.
+    """
+    school_id = models.CharField(max_length=100)
+    class_number = models.CharField(max_length=20)
+    student_id = models.CharField(max_length=50)
+    present_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('school_id', 'class_number', 'student_id')
+
+    def __str__(self):
+        return f"{self.student_id} - Class {self.class_number} - {self.present_count} Present"
+
+    @classmethod
+    def apply_deltas(cls, school_id, class_number, deltas, student_ids):
+        """
+        Adds each {student_id: +1/-1} delta to the stored tallies and returns
+        the resulting present counts for the given student_ids.
+        """
+        wanted_ids = set(student_ids) | {sid for sid, delta in deltas.items() if delta}
+        tallies = {
+            tally.student_id: tally
+            for tally in cls.objects.select_for_update().filter(
+                school_id=school_id,
+                class_number=class_number,
+                student_id__in=wanted_ids
+            )
+        }
+
+        to_create, to_update = [], []
+        for sid, delta in deltas.items():
+            if not delta:
+                continue
+            tally = tallies.get(sid)
+            if tally is None:
+                tally = cls(school_id=school_id, class_number=class_number, student_id=sid)
+                tallies[sid] = tally
+                to_create.append(tally)
+            else:
+                to_update.append(tally)
+            tally.present_count = max(tally.present_count + delta, 0)
+
+        if to_create:
+            cls.objects.bulk_create(to_create)
+        if to_update:
+            cls.objects.bulk_update(to_update, ['present_count'])
+
+        return {sid: tallies[sid].present_count if sid in tallies else 0 for sid in student_ids}
+
+
+class AttendanceAlert(models.Model):
+    """
+    A low attendance email that was sent, used to hold back repeats within the cooldown.
+    """
+    student_id = models.CharField(max_length=50)
+    school_id = models.CharField(max_length=100)
+    class_number = models.CharField(max_length=20)
+    present_count = models.PositiveIntegerField(default=0)
+    percentage = models.FloatField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student_id', 'sent_at']),
+        ]
+
+    def __str__(self):
+        return f"Alert for {self.student_id} at {self.percentage}% on {self.sent_at}"
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting in (or sent from) the outbox drained by the process_email_outbox worker.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    template_name = models.CharField(max_length=100)
+    context_encrypted = models.TextField()
+    recipient_email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.recipient_email} ({self.status})"
+
+
+class PredictionJob(models.Model):
+    """
+    A bulk prediction (a class, a whole school or an uploaded CSV) queued for the
+    process_prediction_jobs worker, which scores it in partitions across a process pool.
+    """
+    CLASS = 'class'
+    SCHOOL = 'school'
+    FILE = 'file'
+
+    KIND_CHOICES = [
+        (CLASS, 'Class'),
+        (SCHOOL, 'School'),
+        (FILE, 'File'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    school_id = models.CharField(max_length=100)
+    class_number = models.CharField(max_length=20, blank=True)
+    upload = models.FileField(upload_to='prediction_jobs/', null=True, blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="prediction_jobs")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Unknown for uploads until the whole file has been read
+    total = models.PositiveIntegerField(null=True, blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    matched_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Renewed as partitions are saved; a running job past it has lost its worker
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} prediction job {self.pk} ({self.status})"
 
-        for record in records:
-            for s in record.students:
-                if s['student_id'] == student_id and s.get('status') == 'present':
-                    present_days += 1
-        return present_days
-
-    def _sync_to_student_model(self, student_data):
-        try:
-            student = Student.objects.get(student_id=student_data['student_id'])
-            student.attendance_percentage = student_data['percentage']
-            student.save()
-        except Student.DoesNotExist:
-            pass
-        
+
+class PredictionJobResult(models.Model):
+    job = models.ForeignKey(PredictionJob, on_delete=models.CASCADE, related_name="results")
+    student_id = models.CharField(max_length=50)
+    final_grade = models.FloatField()
+    # False when the student_id is not a student of the job's school
+    matched = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.student_id}: {self.final_grade}"
+
+
+class PredictionHistory(models.Model):
+    """
+    One predicted final grade, appended by every prediction path and never updated.
+    """
+    student_id = models.CharField(max_length=50)
+    school_id = models.CharField(max_length=100)
+    class_number = models.CharField(max_length=20)
+    predicted_at = models.DateTimeField(default=timezone.now)
+    model_version = models.CharField(max_length=40)
+    final_grade = models.FloatField()
+    # Hash of the eleven feature values the grade was predicted from
+    feature_hash = models.CharField(max_length=16)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student_id', 'predicted_at']),
+            models.Index(fields=['school_id', 'class_number', 'predicted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id}: {self.final_grade} ({self.model_version})"
+
+
+class ModelRelease(models.Model):
+    """
+    A grade model artifact deployed with the deploy_model command. Running workers
+    load the active release, and score a sample of requests with the shadow release,
+    without restarting.
+    """
+    ACTIVE = 'active'
+    SHADOW = 'shadow'
+    RETIRED = 'retired'
+
+    ROLE_CHOICES = [
+        (ACTIVE, 'Active'),
+        (SHADOW, 'Shadow'),
+        (RETIRED, 'Retired'),
+    ]
+
+    path = models.CharField(max_length=500)
+    version = models.CharField(max_length=40)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=RETIRED)
+    shadow_sample_rate = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['role']),
+        ]
+
+    def __str__(self):
+        return f"{self.version} ({self.role})"
+
+
+class ShadowComparison(models.Model):
+    """
+    One live batch scored by both the active model and a shadow release.
+    """
+    release = models.ForeignKey(ModelRelease, on_delete=models.CASCADE, related_name="shadow_comparisons")
+    primary_version = models.CharField(max_length=40)
+    rows = models.PositiveIntegerField()
+    primary_ms = models.FloatField()
+    shadow_ms = models.FloatField()
+    mean_abs_diff = models.FloatField()
+    max_abs_diff = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.primary_version} vs {self.release.version}: {self.mean_abs_diff}"
@@ -30,7 +30,7 @@ class AttendanceSerializer(serializers.ModelSerializer):
     students = StudentAttendanceSerializer(many=True)
     class Meta:
         model = Attendance
-        fields = '__all__'
+        exclude = ['legacy_students']
 
 class ClassSerializer(serializers.ModelSerializer):
     class Meta:
@@ -40,14 +40,10 @@ class ClassSerializer(serializers.ModelSerializer):
 class ClassWorkingDaySerializer(serializers.ModelSerializer):
     class Meta:
         model = ClassWorkingDay
-        fields = ['school', 'school_id', 'class_number', 'working_days']
-
-    # SerializerMethodField to dynamically calculate total_working_days
-    total_working_days = serializers.SerializerMethodField()
+        fields = ['school', 'school_id', 'class_number', 'working_days', 'total_working_days']
 
-    def get_total_working_days(self, obj):
-        # Calculate the total working days based on the `working_days` field
-        return sum(1 for day, is_working in obj.working_days.items() if is_working)
+    working_days = serializers.ReadOnlyField()
+    total_working_days = serializers.ReadOnlyField()
 
 class StudentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,7 +1,13 @@
 import datetime
-from django.db.models.signals import post_save
+import logging
+from django.db.models.signals import post_save, post_delete
+from django.core.signals import request_started
 from django.dispatch import receiver
-from .models import User, Teacher
+from .models import User, Teacher, Student
+from .logics.sampling import forget_school_sample
+from .logics.model_rollout import release_watcher
+
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=User)
 def create_admin_teacher(sender, instance, created, **kwargs):
@@ -24,3 +30,24 @@ def create_admin_teacher(sender, instance, created, **kwargs):
                 "mfa_enabled": True,
             }
         )
+
+
+# Adding or removing a student changes the ids random sampling draws from (update_student handles moves)
+@receiver(post_save, sender=Student)
+def forget_sampled_students_on_add(sender, instance, created, **kwargs):
+    if created:
+        forget_school_sample(instance.school_id)
+
+
+@receiver(post_delete, sender=Student)
+def forget_sampled_students_on_delete(sender, instance, **kwargs):
+    forget_school_sample(instance.school_id)
+
+
+@receiver(request_started)
+def check_model_releases(sender, **kwargs):
+    # Picks up deployed or replaced grade models without restarting the worker
+    try:
+        release_watcher.check()
+    except Exception:
+        logger.exception("Checking model releases failed")
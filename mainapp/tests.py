@@ -0,0 +1,103 @@
+from concurrent.futures import Future
+from datetime import date, timedelta
+from unittest import mock
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+from .models import Attendance, AttendanceMark, Class, PredictionJob, PredictionJobResult, School, Student
+from .logics.attendance import save_attendance_sheet
+from .logics.prediction_jobs import claim_prediction_job, run_prediction_job
+
+
+def create_school_class(students=2):
+    school = School.objects.create(
+        name="S", school_type="x", board="b", medium="m", registration_number="r",
+        email="s@example.com", phone="1", address="a", city="c", state="s", pincode="1"
+    )
+    school_id = str(school.id)
+    Class.objects.create(
+        school="S", school_id=school_id, class_number="10A", threshold=75,
+        start_date=date.today() - timedelta(days=30)
+    )
+    for i in range(students):
+        Student.objects.create(
+            full_name=f"Student {i}", student_id=f"s{i}", email=f"s{i}@example.com", school="S",
+            school_id=school_id, class_assigned="10A", phone="1", parental_education=1, study_hours=2,
+            failures=0, extracurricular=1, participation=3, rating=4, discipline=0, late_submissions=0,
+            prev_grade1=70, prev_grade2=75, final_grade=0
+        )
+    return school_id
+
+
+class SaveAttendanceSheetTests(TestCase):
+    def test_sheet_created_concurrently_is_merged_into(self):
+        school_id = create_school_class()
+        today = date.today()
+        original_first = QuerySet.first
+
+        def first_then_race(queryset):
+            # Another request inserts the same sheet after this one found none
+            result = original_first(queryset)
+            if queryset.model is Attendance and result is None and not Attendance.objects.exists():
+                other = Attendance(school="S", school_id=school_id, class_number="10A", date=today)
+                other.students = [{"student_id": "s0", "status": "present"}]
+                other.save()
+            return result
+
+        with mock.patch.object(QuerySet, 'first', first_then_race):
+            attendance, created = save_attendance_sheet(
+                "S", school_id, "10A", today, [{"student_id": "s1", "status": "absent"}]
+            )
+
+        self.assertFalse(created)
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(
+            dict(AttendanceMark.objects.values_list('student_id', 'status')),
+            {"s0": AttendanceMark.PRESENT, "s1": AttendanceMark.ABSENT}
+        )
+
+
+class ScoredExecutor:
+    """
+    Stands in for the process pool: every partition is already scored.
+    on_submit runs before each partition is handed over.
+    """
+    def __init__(self, on_submit=None):
+        self.on_submit = on_submit
+
+    def submit(self, fn, features):
+        if self.on_submit:
+            self.on_submit()
+        future = Future()
+        future.set_result(('test', [50.0] * len(features)))
+        return future
+
+
+class PredictionJobLeaseTests(TestCase):
+    def test_reclaimed_job_gets_no_writes_from_the_stale_worker(self):
+        school_id = create_school_class(students=3)
+        PredictionJob.objects.create(kind=PredictionJob.CLASS, school_id=school_id, class_number="10A")
+        stale = claim_prediction_job()
+        reclaimed = []
+
+        def lease_expires_and_job_is_reclaimed():
+            # The stale worker stalls after claiming; its lease runs out and another worker claims the job
+            if not reclaimed:
+                PredictionJob.objects.filter(pk=stale.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+                reclaimed.append(claim_prediction_job())
+
+        stale = run_prediction_job(stale, ScoredExecutor(lease_expires_and_job_is_reclaimed), partition_size=2, max_in_flight=1)
+        current = reclaimed[0]
+        self.assertEqual((current.pk, current.attempts), (stale.pk, 2))
+
+        job = PredictionJob.objects.get(pk=current.pk)
+        self.assertEqual(job.status, PredictionJob.RUNNING)
+        self.assertEqual(job.processed, 0)
+        self.assertFalse(PredictionJobResult.objects.exists())
+
+        current = run_prediction_job(current, ScoredExecutor(), partition_size=2, max_in_flight=1)
+
+        job = PredictionJob.objects.get(pk=current.pk)
+        self.assertEqual(job.status, PredictionJob.DONE)
+        self.assertEqual(job.processed, 3)
+        self.assertEqual(PredictionJobResult.objects.count(), 3)
@@ -6,8 +6,13 @@ from .logics.principals import get_all_principals, add_principal, view_principal
 from .logics.class_teachers import get_all_class_teachers, add_class_teacher, view_class_teacher, update_class_teacher, delete_class_teacher, get_teacher_from_token, get_class_teachers_by_school, mfa_update_classteacher
 from .logics.students import get_all_class_students, get_all_students, add_student, view_student, update_student, delete_student, export_students, import_students
 from .logics.class_details import get_assigned_class, update_assigned_class, get_class_details
-from .logics.attendance import get_attendance, add_attendance, update_class_attendance, send_attendance_alert
-from .logics.predict import predict_final_grade, predict_bulk_final_grades, reset_final_grades, predict_random_student_grade
+from .logics.attendance import get_attendance, add_attendance, update_class_attendance, bulk_update_class_attendance, send_attendance_alert
+from .logics.attendance_report import attendance_report
+from .logics.attendance_alerts import send_low_attendance_alerts_view
+from .logics.prediction_jobs import submit_prediction_job, prediction_job_status, prediction_job_results
+from .logics.prediction_history import student_prediction_history, class_prediction_history
+from .logics.model_rollout import shadow_report
+from .logics.predict import predict_final_grade, predict_bulk_final_grades, reset_final_grades, predict_random_student_grade, predict_class_final_grades, what_if_sweep, model_info
 
 urlpatterns = [
     # Login APIs
@@ -64,11 +69,27 @@ urlpatterns = [
     path('attendance/', get_attendance, name='get_attendance'),
     path('addAttendance/', add_attendance, name='add_attendance'),
     path('updateClassAttendance/', update_class_attendance, name='update_class_attendance'),
+    path('bulkUpdateClassAttendance/', bulk_update_class_attendance, name='bulk_update_class_attendance'),
     path('send-alert/', send_attendance_alert, name='send_attendance_alert'),
+    path('sendAttendanceAlerts/', send_low_attendance_alerts_view, name='send_low_attendance_alerts'),
+    path('attendanceReport/', attendance_report, name='attendance_report'),
 
     # Predict Final Grade API
     path('predictStudent/', predict_final_grade, name='predict_final_grade'),
     path("predictRandom/", predict_random_student_grade, name="predict_random_student_grade"),
     path("predictStduentBulk/", predict_bulk_final_grades, name="predict_bulk_final_grades"),
+    path("predictClass/", predict_class_final_grades, name="predict_class_final_grades"),
+    path("whatIfSweep/", what_if_sweep, name="what_if_sweep"),
+    path("modelInfo/", model_info, name="model_info"),
+    path("shadowReport/", shadow_report, name="shadow_report"),
     path("resetFinalGrades/", reset_final_grades, name="reset_final_grades"),
+
+    # Prediction Job APIs
+    path("submitPredictionJob/", submit_prediction_job, name="submit_prediction_job"),
+    path("predictionJobStatus/", prediction_job_status, name="prediction_job_status"),
+    path("predictionJobResults/", prediction_job_results, name="prediction_job_results"),
+
+    # Prediction History APIs
+    path("studentPredictionHistory/", student_prediction_history, name="student_prediction_history"),
+    path("classPredictionHistory/", class_prediction_history, name="class_prediction_history"),
 ]